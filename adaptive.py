@@ -0,0 +1,122 @@
+"""Adaptive difficulty: a 2-down/1-up staircase over sequence length.
+
+Instead of a fixed preset, the staircase picks the next round's length
+(number of digits) from the outcomes so far: two correct rounds in a row
+make the sequence one item longer, a single wrong round makes it one item
+shorter. This converges on the length recalled correctly about 70.7% of the
+time. Until the first reversal it moves two items per step, so a participant
+far from the starting length gets there quickly.
+
+The span estimate is the running mean of the lengths at which the direction
+reversed (ignoring the first `DISCARD_REVERSALS`). All state is a handful of
+numbers updated in O(1) per round; `to_dict`/`from_dict` round-trip it so it
+can be stored in each round's metadata (under ``"staircase"``). `logger_sqlite`
+also keeps the latest state per participant in the ``staircase_state`` table,
+from which `load_state` resumes it.
+"""
+
+from dataclasses import asdict, dataclass, fields
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import logger_sqlite
+from game_core import difficulty_presets
+
+# Early reversals mostly reflect the starting point, not the participant.
+DISCARD_REVERSALS = 2
+# Read by `logger_sqlite` to update ``staircase_state``.
+METADATA_KEY = "staircase"
+
+
+def word_interval_for(length: int) -> int:
+    """Word interval of the difficulty preset covering `length` digits."""
+    presets = sorted(difficulty_presets().values(), key=lambda p: p['min'])
+    for preset in presets:
+        if length <= preset['max']:
+            return preset['word_interval']
+    return presets[-1]['word_interval']
+
+
+@dataclass
+class Staircase:
+    """State of a 2-down/1-up staircase.
+
+    Attributes:
+        length: sequence length (digits) of the next round
+        min_length, max_length: bounds for `length`
+        step: current step size (`initial_step` until the first reversal, then 1)
+        streak: correct rounds in a row at the current length
+        direction: last move, +1 (longer), -1 (shorter) or 0 (none yet)
+        trials, reversals: counts so far
+        reversal_sum: sum of the lengths at the counted reversals
+    """
+    length: int = 5
+    min_length: int = 2
+    max_length: int = 30
+    step: int = 2
+    streak: int = 0
+    direction: int = 0
+    trials: int = 0
+    reversals: int = 0
+    reversal_sum: float = 0.0
+
+    def next_condition(self) -> Tuple[int, int, int]:
+        """``(minimum, maximum, word_interval)`` for `generate_sequence`."""
+        return self.length, self.length, word_interval_for(self.length)
+
+    def update(self, correct: bool) -> None:
+        """Record the outcome of a round played at `next_condition`."""
+        self.trials += 1
+        if correct:
+            self.streak += 1
+            if self.streak < 2:
+                return
+            move = 1
+        else:
+            move = -1
+        self.streak = 0
+        if self.direction and move != self.direction:
+            self.reversals += 1
+            if self.reversals > DISCARD_REVERSALS:
+                self.reversal_sum += self.length
+            self.step = 1
+        self.direction = move
+        self.length = max(self.min_length, min(self.max_length, self.length + move * self.step))
+
+    @property
+    def estimate(self) -> Optional[float]:
+        """Span estimate (mean length at counted reversals), or None before there are any."""
+        counted = self.reversals - DISCARD_REVERSALS
+        return self.reversal_sum / counted if counted > 0 else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        state = asdict(self)
+        state["estimate"] = self.estimate
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "Staircase":
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in state.items() if k in names})
+
+
+def difficulty_label(length: int) -> str:
+    """The ``difficulty`` stored with an adaptive round of `length` digits, e.g. ``"adaptive-7"``."""
+    return f"adaptive-{length}"
+
+
+def load_state(path: Path = None, participant: str = None) -> Optional[Staircase]:
+    """Resume from `participant`'s latest staircase state, if any."""
+    db = logger_sqlite._db_path(path)
+    try:
+        logger_sqlite.flush(db)
+        row = logger_sqlite._reader(db).execute(
+            "SELECT state FROM staircase_state WHERE participant = ?", (participant or "",)
+        ).fetchone()
+    except Exception:
+        return None
+    return Staircase.from_dict(json.loads(row[0])) if row else None
+
+
+__all__ = ["Staircase", "load_state", "difficulty_label", "word_interval_for", "METADATA_KEY"]
@@ -1,14 +1,24 @@
 import time
 import os
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import logger_sqlite as logger
-from game_core import WORDS, generate_sequence, convert_user_input, check_answer
+import metrics
+import stimulus
+from game_core import WORDS, generate_sequence, convert_user_input, check_answer, difficulty_presets
+
+# Limpa a tela e move o cursor para o topo via ANSI, sem criar um processo.
+ANSI_CLEAR = "\033[2J\033[H"
+
+if os.name == 'nt':
+    # Ativa o processamento de sequências ANSI no console do Windows.
+    os.system('')
 
 # ==== Funções ====
 
+@metrics.timed("screen.clear")
 def clear_screen():
     """Limpa a tela do terminal"""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    print(ANSI_CLEAR, end="", flush=True)
 
 def start_screen():
     """Exibe a tela inicial piscando"""
@@ -29,31 +39,41 @@ def start_screen():
         return
     clear_screen()
 
-def choose_level() -> Tuple[int, int, int]:
-    """Pergunta ao usuário o nível e retorna min, max e intervalo de palavras"""
-    difficulties = {
-        '1': {'min': 4, 'max': 6, 'word_interval': 2},
-        '2': {'min': 7, 'max': 10, 'word_interval': 2},
-        '3': {'min': 11, 'max': 15, 'word_interval': 3},
-        '4': {'min': 16, 'max': 20, 'word_interval': 4},
-    }
+def choose_level() -> Optional[Tuple[int, int, int]]:
+    """Pergunta ao usuário o nível e retorna min, max e intervalo de palavras
+
+    Retorna None quando o usuário escolhe o modo adaptativo.
+    """
+    difficulties = difficulty_presets()
     while True:
-        choice = input("Choose difficulty (1=Easy, 2=Medium, 3=Hard, 4=Very Hard): ")
+        choice = input("Choose difficulty (1=Easy, 2=Medium, 3=Hard, 4=Very Hard, a=Adaptive): ").lower()
+        if choice == 'a':
+            logger.log("User selected adaptive difficulty", level="INFO")
+            return None
         if choice in difficulties:
             level = difficulties[choice]
-            logger.log(f"User selected difficulty: {choice}", level="INFO")
+            logger.log("User selected difficulty: %s", choice, level="INFO")
             return level['min'], level['max'], level['word_interval']
         else:
             print("Invalid option. Try again.")
 
 
-def show_sequence(seq: List):
-    """Mostra a sequência na tela, elemento por elemento"""
-    logger.log(f"Showing sequence of {len(seq)} items to user", level="DEBUG")
-    for i, item in enumerate(seq):
-        print(item)
-        time.sleep(2)  # espera 2 segundos antes de limpar
-        clear_screen()
+def difficulty_label(minimum: int, maximum: int, word_interval: int) -> str:
+    """Retorna a chave do preset ('1'..'4') correspondente, ou 'custom'"""
+    for key, level in difficulty_presets().items():
+        if (level['min'], level['max'], level['word_interval']) == (minimum, maximum, word_interval):
+            return key
+    return 'custom'
+
+
+def show_sequence(seq: List) -> stimulus.PresentationTiming:
+    """Mostra a sequência na tela, elemento por elemento.
+
+    Cada item fica 2 segundos na tela, com prazos absolutos medidos por
+    `time.perf_counter`; retorna os tempos reais de exibição de cada item.
+    """
+    logger.log("Showing sequence of %d items to user", len(seq), level="DEBUG")
+    return stimulus.present(seq, show=lambda item: print(item, flush=True), clear=clear_screen)
 
 def get_user_input() -> List:
     """Recebe e converte a entrada do usuário via terminal.
@@ -62,7 +82,7 @@ def get_user_input() -> List:
     consistência com outras interfaces que possam reaproveitar a lógica.
     """
     resposta = input("Enter the sequence you memorized, separated by commas: ")
-    logger.log(f"User raw input: {resposta}", level="DEBUG")
+    logger.log("User raw input: %s", resposta, level="DEBUG")
     return convert_user_input(resposta)
 
 # use check_answer from game_core
@@ -77,33 +97,47 @@ def main():
         logger.log("start_screen interrupted before game start", level="INFO")
         print("Interrupted. Exiting.")
         return
-    last_level = None
+    repeat = False
 
     try:
         while True:
             # Escolha do nível
-            if last_level is None:
-                minimum, maximum, word_interval = choose_level()
+            if not repeat:
+                level = choose_level()
+                staircase = None
+                if level is None:
+                    # Modo adaptativo: retoma o estado salvo com a última rodada.
+                    # Importado só aqui para não pesar na inicialização.
+                    import adaptive
+                    staircase = adaptive.load_state() or adaptive.Staircase()
+            if staircase is not None:
+                minimum, maximum, word_interval = staircase.next_condition()
             else:
-                minimum, maximum, word_interval = last_level
+                minimum, maximum, word_interval = level
 
             # Gera e mostra sequência
-            sequencia_mista, gabarito = generate_sequence(minimum, maximum, WORDS, word_interval)
+            with metrics.span("generate_sequence"):
+                sequencia_mista, gabarito = generate_sequence(minimum, maximum, WORDS, word_interval)
             print(f"Try to memorize {len(sequencia_mista)} items:")
             time.sleep(2)
             clear_screen()
-            show_sequence(sequencia_mista)
+            with metrics.span("show_sequence"):
+                timing = show_sequence(sequencia_mista)
 
-            start_time = time.time()
+            start_time = time.perf_counter()
             # Input do usuário
             user_answer = get_user_input()
-            end_time = time.time()
+            end_time = time.perf_counter()
             elapsed = end_time - start_time
             print(f"You took {elapsed:.2f} seconds to answer.")
-            logger.log(f"Round finished: time={elapsed:.2f}s, items={len(sequencia_mista)}, user_answer={user_answer}", level="INFO")
+            logger.log("Round finished: time=%.2fs, items=%d, user_answer=%s",
+                       elapsed, len(sequencia_mista), user_answer, level="INFO")
 
             # Checa resposta (usa lógica centralizada em game_core)
-            correct, errors, details = check_answer(user_answer, gabarito)
+            with metrics.span("check_answer"):
+                correct, errors, details = check_answer(user_answer, gabarito)
+            if staircase is not None:
+                staircase.update(correct)
             if correct:
                 print("Congratulations! You got it all correct!")
             else:
@@ -114,19 +148,31 @@ def main():
 
             # Persistir resultado estruturado para análise posterior
             try:
-                metadata = {"time": elapsed, "items": len(sequencia_mista)}
+                metadata = {
+                    "time": elapsed,
+                    "items": len(sequencia_mista),
+                    "difficulty": difficulty_label(minimum, maximum, word_interval),
+                    "errors": errors,
+                    "presentation": timing.to_metadata(),
+                }
+                if staircase is not None:
+                    # Comprimento jogado nesta rodada (o estado já aponta para a próxima).
+                    metadata["difficulty"] = adaptive.difficulty_label(minimum)
+                    metadata[adaptive.METADATA_KEY] = staircase.to_dict()
                 data = {"items": sequencia_mista, "answer": user_answer, "details": details, "correct": correct}
-                logger.save_round(metadata, data)
+                with metrics.span("save_round"):
+                    logger.save_round(metadata, data)
             except Exception:
+                metrics.count("save_round.errors")
                 logger.log("Failed saving round to DB", level="ERROR")
 
             # Repetir ou mudar nível
             escolha = input("Repeat? (yy=same level, y=choose level, n=exit): ").lower()
             if escolha == 'yy':
-                last_level = (minimum, maximum, word_interval)
+                repeat = True
                 clear_screen()
             elif escolha == 'y':
-                last_level = None
+                repeat = False
                 clear_screen()
             elif escolha == 'n':
                 logger.log("User chose to exit the game", level="INFO")
@@ -138,7 +184,11 @@ def main():
     except KeyboardInterrupt:
         logger.log("Program interrupted by user", level="INFO")
         print("\nInterrupted. Exiting.")
+    finally:
+        if metrics.enabled():
+            # STM_METRICS=1: guarda os tempos medidos na sessão
+            metrics.dump_json(os.environ.get("STM_METRICS_OUT", "stm_metrics.json"))
     
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    metrics.profiled(main)
\ No newline at end of file
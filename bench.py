@@ -0,0 +1,248 @@
+"""Benchmarks for the `game_core` and `logger_sqlite` hot paths.
+
+Each benchmark reports throughput (ops/sec), per-call latency percentiles
+(p50/p99, in microseconds) and peak traced memory (KiB). Results can be saved
+to JSON and compared against an earlier run to catch regressions:
+
+    python bench.py --out bench_base.json
+    python bench.py --compare bench_base.json --threshold 0.25
+
+With ``--compare`` the exit status is 1 when any benchmark's ops/sec dropped
+by more than the threshold, so it can gate a deploy.
+
+``--processes 1,2,4`` additionally has that many worker processes log into
+one shared database concurrently, checks that no row was lost and reports
+the combined write throughput (exit status 1 if rows are missing).
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import logger_sqlite
+import round_codec
+from game_core import (WORDS, Vocabulary, check_answer, convert_user_input, difficulty_presets, generate_sequence,
+                       parse_answers)
+
+# Synthetic vocabulary sizes exercised in addition to the default WORDS.
+VOCAB_SIZES = (1_000, 10_000)
+
+
+def _percentile(sorted_samples: List[float], q: float) -> float:
+    return sorted_samples[min(len(sorted_samples) - 1, int(q * len(sorted_samples)))]
+
+
+def measure(fn: Callable[[int], None], n: int, finish: Callable[[], None] = None) -> Dict[str, float]:
+    """Time `n` calls of `fn(i)`, plus `finish()` (e.g. a flush) in the total.
+
+    Per-call latency excludes `finish`; ops/sec includes it, so queued writes
+    are only counted once they are durable.
+    """
+    samples = []
+    clock = time.perf_counter
+    start = clock()
+    for i in range(n):
+        t = clock()
+        fn(i)
+        samples.append(clock() - t)
+    if finish:
+        finish()
+    total = clock() - start
+
+    # Separate, shorter pass for memory: tracing slows every allocation down.
+    tracemalloc.start()
+    for i in range(min(n, 200)):
+        fn(i)
+    if finish:
+        finish()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    samples.sort()
+    return {
+        "n": n,
+        "ops_per_sec": n / total,
+        "p50_us": _percentile(samples, 0.50) * 1e6,
+        "p99_us": _percentile(samples, 0.99) * 1e6,
+        "peak_kib": peak / 1024,
+    }
+
+
+def core_benchmarks(n: int) -> Dict[str, Callable[[], Dict[str, float]]]:
+    rng = random.Random(1234)
+    vocabularies = {"words": WORDS}
+    vocabularies.update({f"vocab{size}": [f"word{i}" for i in range(size)] for size in VOCAB_SIZES})
+    vocabularies.update({f"{name}-prebuilt": Vocabulary(words) for name, words in list(vocabularies.items())})
+    benches = {}
+    for level, preset in difficulty_presets().items():
+        args = (preset["min"], preset["max"])
+        interval = preset["word_interval"]
+        for vname, vocab in vocabularies.items():
+            benches[f"generate_sequence/level{level}/{vname}"] = (
+                lambda args=args, vocab=vocab, interval=interval: measure(
+                    lambda i: generate_sequence(*args, vocab, interval), n))
+
+        keys = [generate_sequence(*args, WORDS, interval)[1] for _ in range(256)]
+        raws = [", ".join(str(x) for x in key) for key in keys]
+        answers = [convert_user_input(raw) for raw in raws]
+        for answer in answers[::2]:
+            answer[rng.randrange(len(answer))] = "wrong"
+        benches[f"convert_user_input/level{level}"] = (
+            lambda raws=raws: measure(lambda i: convert_user_input(raws[i % 256]), n))
+        benches[f"parse_answers/level{level}"] = (
+            lambda raws=raws: measure(lambda i: sum(1 for _ in parse_answers(raws)), max(n // 256, 1)))
+        benches[f"check_answer/level{level}"] = (
+            lambda keys=keys, answers=answers: measure(lambda i: check_answer(answers[i % 256], keys[i % 256]), n))
+        benches[f"check_answer_nodetails/level{level}"] = (
+            lambda keys=keys, answers=answers: measure(
+                lambda i: check_answer(answers[i % 256], keys[i % 256], details=False), n))
+    return benches
+
+
+def storage_benchmarks(n: int, db: Path) -> Dict[str, Callable[[], Dict[str, float]]]:
+    key = generate_sequence(11, 15, WORDS, 3)[1]
+    correct, errors, details = check_answer(key, key)
+    metadata = {"time": 3.2, "items": len(key), "difficulty": "3", "errors": errors}
+    data = {"items": key, "answer": key, "details": details, "correct": correct}
+
+    blob = round_codec.dumps_data(data)
+
+    def flush():
+        logger_sqlite.flush(db)
+
+    def save_round_journal():
+        logger_sqlite.set_round_journal(True)
+        try:
+            return measure(lambda i: logger_sqlite.save_round(metadata, data, path=db), n // 4, flush)
+        finally:
+            logger_sqlite.set_round_journal(False)
+
+    return {
+        "log": lambda: measure(lambda i: logger_sqlite.log(f"bench message {i}", level="DEBUG", path=db), n, flush),
+        "save_round": lambda: measure(lambda i: logger_sqlite.save_round(metadata, data, path=db), n // 4, flush),
+        "save_round/journal": save_round_journal,
+        "round_codec/encode": lambda: measure(lambda i: round_codec.dumps_data(data), n),
+        "round_codec/decode": lambda: measure(lambda i: round_codec.loads_data(blob), n),
+        "fetch_last": lambda: measure(lambda i: logger_sqlite.fetch_last(20, path=db), n // 10),
+    }
+
+
+def run(n: int, pattern: str = "") -> Dict[str, Dict[str, float]]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "bench.db"
+        logger_sqlite.init_db(db)
+        benches = core_benchmarks(n)
+        benches.update(storage_benchmarks(n, db))
+        for name, bench in benches.items():
+            if pattern in name:
+                results[name] = bench()
+                r = results[name]
+                print(f"{name:<48} {r['ops_per_sec']:>12,.0f} ops/s  p50 {r['p50_us']:>9.2f} us  "
+                      f"p99 {r['p99_us']:>9.2f} us  peak {r['peak_kib']:>8.1f} KiB")
+        logger_sqlite.close()
+    return results
+
+
+def _process_worker(db: Path, worker: int, rows: int):
+    for i in range(rows):
+        logger_sqlite.log("worker %d row %d", worker, i, level="INFO", path=db)
+        if i % 4 == 0:
+            logger_sqlite.save_round({"time": 1.0, "items": 1, "worker": worker},
+                                     {"items": [i % 10], "answer": [i % 10],
+                                      "details": [(i % 10, i % 10, True)], "correct": True}, path=db)
+    logger_sqlite.close()
+
+
+def run_processes(counts: List[int], rows: int) -> Dict[str, Dict[str, float]]:
+    """Log `rows` rows from each of N concurrent processes into one database.
+
+    Returns throughput per N and raises RuntimeError if any row is missing.
+    """
+    results = {}
+    for n in counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Path(tmp) / "bench.db"
+            logger_sqlite.init_db(db)
+            procs = [multiprocessing.Process(target=_process_worker, args=(db, w, rows)) for w in range(n)]
+            start = time.perf_counter()
+            for p in procs:
+                p.start()
+            for p in procs:
+                p.join()
+            total = time.perf_counter() - start
+            logger_sqlite.close()
+
+            conn = logger_sqlite._connect(db)
+            logs = conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+            rounds = conn.execute("SELECT COUNT(*) FROM rounds").fetchone()[0]
+            conn.close()
+            expected_logs, expected_rounds = n * rows, n * ((rows + 3) // 4)
+            written = logs + rounds
+            print(f"processes={n:<3} {written / total:>12,.0f} rows/s  logs {logs}/{expected_logs}  "
+                  f"rounds {rounds}/{expected_rounds}")
+            if (logs, rounds) != (expected_logs, expected_rounds):
+                raise RuntimeError(f"{n} processes: rows were lost")
+            results[f"processes/{n}"] = {"n": written, "ops_per_sec": written / total}
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """Return the names of benchmarks whose ops/sec dropped by more than `threshold`."""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        change = r["ops_per_sec"] / base["ops_per_sec"] - 1
+        flag = "REGRESSION" if change < -threshold else ""
+        print(f"{name:<48} {change:>+8.1%} {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark game_core and logger_sqlite hot paths.")
+    parser.add_argument("-n", type=int, default=20_000, help="calls per benchmark")
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative ops/sec drop")
+    parser.add_argument("--processes", default=None,
+                        help="comma-separated worker counts for the multi-process logging check, e.g. 1,2,4")
+    args = parser.parse_args(argv)
+
+    results = run(args.n, args.filter)
+    if args.processes:
+        try:
+            results.update(run_processes([int(n) for n in args.processes.split(",")], args.n))
+        except RuntimeError as exc:
+            print(exc)
+            sys.exit(1)
+    if args.out:
+        report = {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        }
+        Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Saved results to {args.out}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))["results"]
+        print(f"\nCompared with {args.compare}:")
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,437 @@
+"""Build the web client's icons and precompressed static files.
+
+One command replaces the old ``generate_*favicons*.py`` scripts:
+
+- renders ``public/assets/images/favicon.svg`` with NumPy at every size the
+  pages and the web app manifest use (16, 32, 48, 180, 192 and 512 pixels),
+  with analytic anti-aliasing computed for all pixels at once;
+- packs 16/32/48 into ``favicon.ico`` as a real multi-image ICO (32-bit BMP
+  entries with alpha and AND mask, which every ICO reader understands);
+- writes ``public/site.webmanifest`` pointing at the large icons;
+- writes ``.gz`` (and ``.br`` when the ``brotli`` package is installed)
+  variants of every compressible file under ``public/``, which `server.py`
+  serves as-is instead of compressing at startup.
+
+Every output is keyed by a SHA-256 of its inputs (the source files, the
+output size, and this script for rendered files) in `MANIFEST_PATH`. Outputs
+whose key and content are unchanged are skipped, outputs whose sources are
+gone are removed, and the paths written or removed are printed, so a deploy
+can upload just those.
+
+Only the SVG subset the icon uses is supported: ``<path>`` (M/L/H/V/C/Z,
+absolute or relative) and ``<circle>``, with solid ``#rgb``/``#rrggbb``
+fill and stroke. Stroke joins and caps are drawn round.
+
+Requires NumPy.
+
+Usage:
+    python build_assets.py            # build, list changed files
+    python build_assets.py --force    # re-render and recompress everything
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+from pathlib import Path
+import re
+import struct
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import xml.etree.ElementTree as ET
+import zlib
+
+import numpy as np
+
+from static_assets import COMPRESSIBLE, MIN_COMPRESS_BYTES, PRECOMPRESSED, PUBLIC_DIR
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+ICON_SOURCE = "assets/images/favicon.svg"
+MANIFEST_PATH = Path(__file__).with_name(".asset-manifest.json")
+# Rendered icons as (path under public/, size in pixels).
+PNG_ICONS = (
+    ("assets/images/favicon-16.png", 16),
+    ("assets/images/favicon-32.png", 32),
+    ("assets/images/favicon-48.png", 48),
+    ("assets/images/apple-touch-icon.png", 180),
+    ("assets/images/icon-192.png", 192),
+    ("assets/images/icon-512.png", 512),
+)
+ICO_PATH = "assets/images/favicon.ico"
+ICO_SIZES = (16, 32, 48)
+WEB_MANIFEST = "site.webmanifest"
+# --bg in base.css. iOS shows transparent touch icons on black, so that one
+# gets the page background instead.
+BACKGROUND = "#0b0f14"
+OPAQUE_ICONS = ("assets/images/apple-touch-icon.png",)
+# Line segments per cubic Bézier when flattening paths.
+CURVE_SEGMENTS = 24
+
+_SVG_NS = "{http://www.w3.org/2000/svg}"
+_PATH_TOKEN = re.compile(r"[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_PATH_ARGS = {"M": 2, "L": 2, "H": 1, "V": 1, "C": 6, "Z": 0}
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+# ---- rasterization ----
+
+def _color(value: str) -> Optional[np.ndarray]:
+    """RGB in 0..1 for ``#rgb``/``#rrggbb``; None for ``none``."""
+    value = value.strip().lower()
+    if value == "none":
+        return None
+    if re.fullmatch(r"#[0-9a-f]{3}", value):
+        value = "#" + "".join(c * 2 for c in value[1:])
+    if not re.fullmatch(r"#[0-9a-f]{6}", value):
+        raise ValueError(f"unsupported color {value!r}, expected #rgb, #rrggbb or none")
+    return np.array([int(value[i:i + 2], 16) for i in (1, 3, 5)]) / 255.0
+
+
+def _polylines(d: str) -> List[np.ndarray]:
+    """Flatten SVG path data into polylines, one ``(n, 2)`` array per subpath."""
+    tokens = _PATH_TOKEN.findall(d)
+    lines, current = [], []
+    x = y = start_x = start_y = 0.0
+    command = None
+    i = 0
+    while i < len(tokens):
+        if tokens[i].isalpha():
+            command = tokens[i]
+            i += 1
+        elif command is None:
+            raise ValueError(f"path data must start with a command: {d!r}")
+        op = command.upper()
+        if op not in _PATH_ARGS:
+            raise ValueError(f"unsupported path command {command!r}")
+        args = tokens[i:i + _PATH_ARGS[op]]
+        if len(args) < _PATH_ARGS[op] or any(t.isalpha() for t in args):
+            raise ValueError(f"missing arguments for path command {command!r}")
+        i += len(args)
+        args = [float(t) for t in args]
+        dx, dy = (x, y) if command.islower() else (0.0, 0.0)
+        if op == "M":
+            if len(current) > 1:
+                lines.append(current)
+            x, y = dx + args[0], dy + args[1]
+            start_x, start_y = x, y
+            current = [(x, y)]
+            command = "l" if command.islower() else "L"  # further pairs are line-tos
+            continue
+        if not current:
+            current = [(x, y)]
+        if op == "Z":
+            current.append((start_x, start_y))
+            lines.append(current)
+            current = []
+            x, y = start_x, start_y
+            command = None
+        elif op == "L":
+            x, y = dx + args[0], dy + args[1]
+            current.append((x, y))
+        elif op == "H":
+            x = dx + args[0]
+            current.append((x, y))
+        elif op == "V":
+            y = dy + args[0]
+            current.append((x, y))
+        else:  # C
+            p0 = np.array([x, y])
+            p1, p2, p3 = (np.array([dx + args[k], dy + args[k + 1]]) for k in (0, 2, 4))
+            t = np.linspace(0.0, 1.0, CURVE_SEGMENTS + 1)[1:, None]
+            s = 1.0 - t
+            current.extend(map(tuple, s ** 3 * p0 + 3 * s * s * t * p1 + 3 * s * t * t * p2 + t ** 3 * p3))
+            x, y = p3
+    if len(current) > 1:
+        lines.append(current)
+    return [np.array(line, dtype=np.float64) for line in lines]
+
+
+def _polyline_distance(px: np.ndarray, py: np.ndarray, points: np.ndarray, reach: float) -> np.ndarray:
+    """Distance from every pixel center to the nearest segment of `points`.
+
+    Only pixels within `reach` of a segment's bounding box are computed;
+    the rest are left at infinity.
+    """
+    xs, ys = px[0], py[:, 0]
+    best = np.full(px.shape, np.inf)
+    for (ax, ay), (bx, by) in zip(points[:-1], points[1:]):
+        rows = slice(np.searchsorted(ys, min(ay, by) - reach), np.searchsorted(ys, max(ay, by) + reach, "right"))
+        cols = slice(np.searchsorted(xs, min(ax, bx) - reach), np.searchsorted(xs, max(ax, bx) + reach, "right"))
+        x, y = px[rows, cols], py[rows, cols]
+        sx, sy = bx - ax, by - ay
+        length_sq = sx * sx + sy * sy
+        t = 0.0 if length_sq == 0 else np.clip(((x - ax) * sx + (y - ay) * sy) / length_sq, 0.0, 1.0)
+        window = best[rows, cols]
+        np.minimum(window, np.hypot(x - ax - t * sx, y - ay - t * sy), out=window)
+    return best
+
+
+def _coverage(distance: np.ndarray, half_width: float) -> np.ndarray:
+    """Fraction of each pixel covered by a band of `half_width` around distance 0 (pixel units).
+
+    Edges ramp over one pixel; bands thinner than a pixel are capped at
+    their width so hairlines fade instead of becoming a full pixel wide.
+    """
+    return np.clip(np.minimum(half_width + 0.5 - distance, 2.0 * half_width), 0.0, 1.0)
+
+
+def _shapes(element, style: Dict[str, str], px, py, scale) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yield ``(rgb, coverage)`` for every painted shape under `element`, in document order."""
+    style = dict(style)
+    for name in ("fill", "stroke", "stroke-width"):
+        if name in element.attrib:
+            style[name] = element.attrib[name]
+    tag = element.tag.replace(_SVG_NS, "")
+    fill = _color(style["fill"])
+    stroke = _color(style["stroke"])
+    half_width = float(style["stroke-width"]) * scale / 2
+    if tag == "path":
+        if fill is not None:
+            raise ValueError("filled paths are not supported; use fill=\"none\"")
+        if stroke is not None:
+            for points in _polylines(element.attrib["d"]):
+                # Coverage is zero from half a pixel beyond the stroke edge.
+                distance = _polyline_distance(px, py, points, (half_width + 1) / scale)
+                yield stroke, _coverage(distance * scale, half_width)
+    elif tag == "circle":
+        cx, cy, r = (float(element.attrib.get(k, 0)) for k in ("cx", "cy", "r"))
+        distance = np.hypot(px - cx, py - cy) * scale
+        if fill is not None:
+            yield fill, _coverage(distance, r * scale)
+        if stroke is not None:
+            yield stroke, _coverage(np.abs(distance - r * scale), half_width)
+    elif tag not in ("svg", "g"):
+        raise ValueError(f"unsupported SVG element <{tag}>")
+    for child in element:
+        if not isinstance(child.tag, str) or child.tag.replace(_SVG_NS, "") in ("title", "desc"):
+            continue
+        yield from _shapes(child, style, px, py, scale)
+
+
+def render(svg: bytes, size: int, background: Optional[str] = None) -> np.ndarray:
+    """Rasterize `svg` into a ``(size, size, 4)`` uint8 RGBA array.
+
+    The view box is scaled uniformly to fit and centered.
+    """
+    root = ET.fromstring(svg)
+    if "viewBox" in root.attrib:
+        vx, vy, vw, vh = (float(v) for v in root.attrib["viewBox"].replace(",", " ").split())
+    else:
+        vx = vy = 0.0
+        vw, vh = float(root.attrib["width"]), float(root.attrib["height"])
+    scale = size / max(vw, vh)
+    # Pixel centers in user units.
+    xs = (np.arange(size) + 0.5) / scale + vx - (size / scale - vw) / 2
+    ys = (np.arange(size) + 0.5) / scale + vy - (size / scale - vh) / 2
+    px, py = np.meshgrid(xs, ys)
+
+    # Premultiplied color and alpha, composited with "source over".
+    rgb = np.zeros((size, size, 3))
+    alpha = np.zeros((size, size))
+    if background is not None:
+        rgb[:] = _color(background)
+        alpha[:] = 1.0
+    defaults = {"fill": "#000", "stroke": "none", "stroke-width": "1"}
+    for color, coverage in _shapes(root, defaults, px, py, scale):
+        rgb *= (1.0 - coverage)[..., None]
+        rgb += color * coverage[..., None]
+        alpha *= 1.0 - coverage
+        alpha += coverage
+
+    out = np.empty((size, size, 4), dtype=np.uint8)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        straight = np.where(alpha[..., None] > 0, rgb / alpha[..., None], 0.0)
+    out[..., :3] = np.rint(np.clip(straight, 0.0, 1.0) * 255)
+    out[..., 3] = np.rint(alpha * 255)
+    return out
+
+
+# ---- encoders ----
+
+def _png_chunk(tag: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body)) + tag + body + struct.pack(">I", zlib.crc32(tag + body))
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """8-bit RGBA PNG; uses whichever of the None/Sub/Up row filters compresses best."""
+    height, width = rgba.shape[:2]
+    rows = rgba.reshape(height, width * 4)
+    sub = rows.copy()
+    sub[:, 4:] -= rows[:, :-4]  # uint8 arithmetic wraps modulo 256, as PNG expects
+    up = rows.copy()
+    up[1:] -= rows[:-1]
+    best = None
+    for filter_type, filtered in ((0, rows), (1, sub), (2, up)):
+        data = np.empty((height, width * 4 + 1), dtype=np.uint8)
+        data[:, 0] = filter_type
+        data[:, 1:] = filtered
+        compressed = zlib.compress(data.tobytes(), 9)
+        if best is None or len(compressed) < len(best):
+            best = compressed
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)  # 8-bit RGBA, no interlace
+    return _PNG_SIGNATURE + _png_chunk(b"IHDR", header) + _png_chunk(b"IDAT", best) + _png_chunk(b"IEND", b"")
+
+
+def encode_ico(images: List[np.ndarray]) -> bytes:
+    """Multi-image ICO with one 32-bit BMP entry (alpha plus AND mask) per RGBA image."""
+    offset = 6 + 16 * len(images)
+    entries, bodies = [], []
+    for rgba in images:
+        height, width = rgba.shape[:2]
+        pixels = np.ascontiguousarray(rgba[::-1, :, [2, 1, 0, 3]]).tobytes()  # bottom-up BGRA
+        mask = np.packbits(rgba[::-1, :, 3] == 0, axis=1)
+        mask = np.pad(mask, ((0, 0), (0, -mask.shape[1] % 4))).tobytes()  # rows padded to 32 bits
+        # BITMAPINFOHEADER; the height counts both the color and the mask rows.
+        body = struct.pack("<IiiHHIIiiII", 40, width, 2 * height, 1, 32, 0, len(pixels) + len(mask), 0, 0, 0, 0)
+        body += pixels + mask
+        entries.append(struct.pack("<BBBBHHII", width % 256, height % 256, 0, 0, 1, 32, len(body), offset))
+        bodies.append(body)
+        offset += len(body)
+    return struct.pack("<HHH", 0, 1, len(images)) + b"".join(entries) + b"".join(bodies)
+
+
+def web_manifest() -> bytes:
+    icons = [{"src": path, "sizes": f"{size}x{size}", "type": "image/png"}
+             for path, size in PNG_ICONS if size >= 192]
+    manifest = {
+        "name": "Sequence Retention",
+        "short_name": "Sequence Retention",
+        "start_url": "./index.html",
+        "display": "standalone",
+        "background_color": BACKGROUND,
+        "theme_color": BACKGROUND,
+        "icons": icons,
+    }
+    return (json.dumps(manifest, indent=2) + "\n").encode("utf-8")
+
+
+# ---- incremental build ----
+
+def _sha256(*parts: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(struct.pack("<Q", len(part)))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class _Build:
+    """Writes outputs whose inputs changed and records them in the manifest."""
+
+    def __init__(self, root: Path, manifest_path: Path, force: bool):
+        self.root = root
+        self.manifest_path = manifest_path
+        self.force = force
+        try:
+            self.previous = json.loads(manifest_path.read_text(encoding="utf-8")).get("outputs", {})
+        except (OSError, ValueError):
+            self.previous = {}
+        self.outputs: Dict[str, Dict[str, str]] = {}
+        self.written: List[str] = []
+        self.removed: List[str] = []
+        self.skipped = 0
+
+    def output(self, rel: str, key: str, make: Callable[[], Optional[bytes]]):
+        """Produce `rel` with `make()` unless an output with the same `key` is already there.
+
+        `make` may return None when there is nothing to write for this key.
+        """
+        path = self.root / rel
+        entry = self.previous.get(rel)
+        if not self.force and entry and entry["key"] == key and path.is_file():
+            if _sha256(path.read_bytes()) == entry["sha256"]:
+                self.outputs[rel] = entry
+                self.skipped += 1
+                return
+        data = make()
+        if data is None:
+            return
+        self.outputs[rel] = {"key": key, "sha256": _sha256(data)}
+        # Identical bytes are left alone, so file times and deploys don't see a change.
+        if path.is_file() and path.read_bytes() == data:
+            self.skipped += 1
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        self.written.append(rel)
+
+    def finish(self):
+        """Remove outputs of the previous build that weren't produced again; save the manifest."""
+        for rel, entry in self.previous.items():
+            path = self.root / rel
+            if rel in self.outputs or not path.is_file():
+                continue
+            # Only delete what this script wrote and nobody changed since.
+            if _sha256(path.read_bytes()) == entry["sha256"]:
+                path.unlink()
+                self.removed.append(rel)
+        manifest = {"outputs": dict(sorted(self.outputs.items()))}
+        self.manifest_path.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+
+
+def _compressible(path: Path, size: int) -> bool:
+    content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    return size >= MIN_COMPRESS_BYTES and content_type.startswith(COMPRESSIBLE)
+
+
+def _smaller(raw: bytes, body: bytes) -> Optional[bytes]:
+    return body if len(body) < len(raw) else None
+
+
+def build(root: Path = PUBLIC_DIR, manifest_path: Path = MANIFEST_PATH, force: bool = False) -> _Build:
+    """Build every asset under `root`; returns the build with its `written`/`removed` paths."""
+    root = Path(root)
+    result = _Build(root, Path(manifest_path), force)
+    script = Path(__file__).read_bytes()
+    svg = (root / ICON_SOURCE).read_bytes()
+
+    for rel, size in PNG_ICONS:
+        background = BACKGROUND if rel in OPAQUE_ICONS else None
+        result.output(rel, _sha256(script, svg, rel.encode(), str(size).encode()),
+                      lambda size=size, background=background: encode_png(render(svg, size, background)))
+    result.output(ICO_PATH, _sha256(script, svg, repr(ICO_SIZES).encode()),
+                  lambda: encode_ico([render(svg, size) for size in ICO_SIZES]))
+    result.output(WEB_MANIFEST, _sha256(script), web_manifest)
+
+    # Precompressed variants of everything (including what was just written).
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.suffix in PRECOMPRESSED or path.name.endswith(".tmp"):
+            continue
+        raw = path.read_bytes()
+        if not _compressible(path, len(raw)):
+            continue
+        rel = path.relative_to(root).as_posix()
+        source = hashlib.sha256(raw).digest()
+        result.output(rel + ".gz", _sha256(b"gzip-9", source),
+                      lambda raw=raw: _smaller(raw, gzip.compress(raw, compresslevel=9, mtime=0)))
+        # Without brotli an up-to-date .br from an earlier build is kept, but
+        # none is created.
+        result.output(rel + ".br", _sha256(b"brotli-11", source),
+                      lambda raw=raw: _smaller(raw, brotli.compress(raw, quality=11)) if brotli else None)
+    result.finish()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render icons and precompress static files under public/.")
+    parser.add_argument("--root", type=Path, default=PUBLIC_DIR, help="static root (defaults to public/)")
+    parser.add_argument("--manifest", type=Path, default=MANIFEST_PATH, help="build manifest path")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the inputs are unchanged")
+    args = parser.parse_args(argv)
+
+    result = build(args.root, args.manifest, args.force)
+    for rel in result.written:
+        print(f"  wrote   {rel}")
+    for rel in result.removed:
+        print(f"  removed {rel}")
+    print(f"{len(result.written)} written, {len(result.removed)} removed, {result.skipped} unchanged")
+
+
+if __name__ == "__main__":
+    main()
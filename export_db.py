@@ -0,0 +1,169 @@
+"""Stream the `logs` and `rounds` tables out of the log database.
+
+Rows are read with a cursor in fixed-size chunks and written as they come,
+so memory use does not depend on the size of the table. Supported formats
+are CSV, JSON Lines and (when `pyarrow` is installed) Parquet.
+
+Exports can be incremental: only rows with ``id`` greater than ``since_id``
+are written, and the last exported id is returned (and optionally kept in a
+small JSON state file) so a nightly job only ships new rows.
+
+Usage:
+    python export_db.py rounds --format jsonl --out rounds.jsonl --state export_state.json
+"""
+
+import argparse
+import csv
+import json
+from pathlib import Path
+from typing import Iterator, List, Sequence, Tuple
+
+import logger_sqlite
+import round_codec
+import schema
+
+TABLES = {
+    "logs": ("id", "timestamp", "level", "message"),
+    "rounds": ("id", "timestamp", "participant", "difficulty", "item_count", "elapsed", "correct", "errors", "meta",
+               "data"),
+}
+FORMATS = ("csv", "jsonl", "parquet")
+CHUNK_SIZE = 5000
+
+
+def iter_chunks(table: str, since_id: int = 0, chunk_size: int = CHUNK_SIZE,
+                path: Path = None) -> Iterator[List[Tuple]]:
+    """Yield lists of at most `chunk_size` rows of `table` with id > `since_id`, by id.
+
+    Binary `rounds.data` records are converted back to their JSON text.
+    Raises FileNotFoundError if the database does not exist.
+    """
+    if table not in TABLES:
+        raise ValueError(f"unknown table {table!r}, expected one of {sorted(TABLES)}")
+    db = logger_sqlite._db_path(path)
+    logger_sqlite.flush(db)
+    conn = schema.connect(db, create=False)
+    try:
+        cur = conn.execute(
+            f"SELECT {', '.join(TABLES[table])} FROM {table} WHERE id > ? ORDER BY id",
+            (since_id,),
+        )
+        decode = table == "rounds"
+        if decode:
+            round_codec.load_vocabularies(conn)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            if decode:
+                # Binary `data` records are written out as the JSON they stand for.
+                rows = [(*row[:-1], _data_json(row[-1])) for row in rows]
+            yield rows
+    finally:
+        conn.close()
+
+
+def _data_json(value):
+    if isinstance(value, bytes):
+        return json.dumps(round_codec.loads_data(value))
+    return value
+
+
+def _write_csv(out, columns: Sequence[str], chunks) -> int:
+    with open(out, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        last = None
+        for rows in chunks:
+            writer.writerows(rows)
+            last = rows[-1][0]
+    return last
+
+
+def _write_jsonl(out, columns: Sequence[str], chunks) -> int:
+    with open(out, "w", encoding="utf-8") as f:
+        last = None
+        for rows in chunks:
+            f.writelines(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+            last = rows[-1][0]
+    return last
+
+
+def _write_parquet(out, columns: Sequence[str], chunks) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from None
+
+    # Fixed schema: inferring it from the first chunk breaks when a column
+    # happens to be all NULL there.
+    types = {"id": pa.int64(), "item_count": pa.int64(), "elapsed": pa.float64(),
+             "correct": pa.int64(), "errors": pa.int64()}
+    schema = pa.schema([(name, types.get(name, pa.string())) for name in columns])
+    last = None
+    with pq.ParquetWriter(out, schema) as writer:
+        for rows in chunks:
+            # Only one chunk is held as Arrow columns at a time.
+            writer.write_table(pa.Table.from_pylist([dict(zip(columns, row)) for row in rows], schema=schema))
+            last = rows[-1][0]
+    return last
+
+
+_WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet}
+
+
+def export(table: str, out: Path, fmt: str = "csv", since_id: int = 0,
+           chunk_size: int = CHUNK_SIZE, path: Path = None) -> int:
+    """Export rows of `table` with id > `since_id` to `out`.
+
+    Returns the id of the last exported row, or `since_id` if there was
+    nothing new (in which case no file is written).
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"unknown format {fmt!r}, expected one of {FORMATS}")
+    chunks = iter_chunks(table, since_id, chunk_size, path)
+    first = next(chunks, None)
+    if first is None:
+        return since_id
+
+    def all_chunks():
+        yield first
+        yield from chunks
+
+    return _WRITERS[fmt](out, TABLES[table], all_chunks())
+
+
+def _load_state(state: Path) -> dict:
+    try:
+        return json.loads(Path(state).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export log.db tables in chunks.")
+    parser.add_argument("table", choices=sorted(TABLES))
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--out", required=True, help="output file")
+    parser.add_argument("--db", default=None, help="database path (defaults to log.db next to this script)")
+    parser.add_argument("--since-id", type=int, default=None, help="only export rows with a larger id")
+    parser.add_argument("--state", default=None,
+                        help="JSON file remembering the last exported id per table (incremental export)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    state = _load_state(args.state) if args.state else {}
+    since_id = args.since_id if args.since_id is not None else state.get(args.table, 0)
+    last = export(args.table, args.out, args.format, since_id, args.chunk_size, args.db)
+    if last == since_id:
+        print(f"No {args.table} rows after id {since_id}; nothing exported.")
+        return
+    print(f"Exported {args.table} rows {since_id + 1}..{last} to {args.out}")
+    if args.state:
+        state[args.table] = last
+        Path(args.state).write_text(json.dumps(state, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""Vectorized batch counterparts of the `game_core` functions.
+
+These helpers are meant for simulations and parameter sweeps that need
+millions of trials. Instead of lists of lists they work on compact columnar
+NumPy arrays: one flat array per field plus an ``offsets`` array delimiting
+each trial (trial ``i`` owns ``values[offsets[i]:offsets[i + 1]]``).
+
+Requires NumPy; the interactive game and `game_core` do not.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from game_core import Vocabulary, _validate_bounds
+
+# Upper bound on the number of random keys drawn at once when sampling words,
+# so memory stays flat for large batches over large vocabularies.
+_CHUNK_ELEMENTS = 1 << 22
+
+SeedLike = Union[None, int, np.random.Generator]
+
+# Item codes used by the batch scorer: digits are their own value, words are
+# WORD_CODE_BASE + vocabulary index. Negative codes never match a key item.
+WORD_CODE_BASE = 10
+PAD = -1
+UNKNOWN = -2
+
+
+@dataclass
+class SequenceBatch:
+    """Columnar storage for ``n`` generated trials.
+
+    Attributes:
+        vocabulary: distinct words, in first-seen order; word indices refer here
+        word_interval: a word follows every ``word_interval``-th digit
+        digits: all digits of all trials, flattened (uint8)
+        digit_offsets: ``n + 1`` offsets into ``digits``
+        word_indices: all word indices of all trials, flattened (int32)
+        word_offsets: ``n + 1`` offsets into ``word_indices``
+    """
+    vocabulary: Tuple[str, ...]
+    word_interval: int
+    digits: np.ndarray
+    digit_offsets: np.ndarray
+    word_indices: np.ndarray
+    word_offsets: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.digit_offsets) - 1
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Number of digits in each trial."""
+        return np.diff(self.digit_offsets)
+
+    @property
+    def item_counts(self) -> np.ndarray:
+        """Number of presented items (digits + words) in each trial."""
+        return self.lengths + np.diff(self.word_offsets)
+
+    def trial(self, i: int) -> Tuple[List[Any], List[Any]]:
+        """Rebuild trial ``i`` as ``(sequence, key)`` like `generate_sequence`."""
+        digits = self.digits[self.digit_offsets[i]:self.digit_offsets[i + 1]].tolist()
+        words = [self.vocabulary[w] for w in
+                 self.word_indices[self.word_offsets[i]:self.word_offsets[i + 1]].tolist()]
+        sequence: List[Any] = []
+        for idx, num in enumerate(digits):
+            sequence.append(num)
+            if (idx + 1) % self.word_interval == 0 and words:
+                sequence.append(words.pop(0))
+        return sequence, list(sequence)
+
+    def __iter__(self) -> Iterator[Tuple[List[Any], List[Any]]]:
+        for i in range(len(self)):
+            yield self.trial(i)
+
+    def key_codes(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the answer keys as ``(codes, lengths)`` for `score_batch`.
+
+        ``codes`` is an ``(n, max_items)`` array padded with `PAD`.
+        """
+        lengths = self.lengths
+        word_counts = np.diff(self.word_offsets)
+        item_counts = lengths + word_counts
+        codes = np.full((len(self), int(item_counts.max(initial=0))), PAD, dtype=np.int32)
+
+        rows = np.repeat(np.arange(len(self)), lengths)
+        j = np.arange(len(self.digits)) - np.repeat(self.digit_offsets[:-1], lengths)
+        codes[rows, j + np.minimum(j // self.word_interval, word_counts[rows])] = self.digits
+
+        rows = np.repeat(np.arange(len(self)), word_counts)
+        m = np.arange(len(self.word_indices)) - np.repeat(self.word_offsets[:-1], word_counts)
+        codes[rows, (m + 1) * self.word_interval + m] = self.word_indices + WORD_CODE_BASE
+        return codes, item_counts
+
+
+def _offsets(counts: np.ndarray) -> np.ndarray:
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+def _sample_words(rng: np.random.Generator, counts: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Draw ``counts[i]`` distinct word indices per trial, in draw order.
+
+    Each row is an independent weighted sample without replacement, which
+    matches drawing uniformly from a list that repeats each word
+    ``weights[w]`` times and removing it once chosen. Zero-weight words are
+    never drawn, so ``counts`` must not exceed the number of positive weights.
+    """
+    kmax = int(counts.max(initial=0))
+    if kmax == 0:
+        return np.empty(0, dtype=np.int32)
+    # Both samplers only see the drawable words; indices are mapped back below.
+    support = np.flatnonzero(weights > 0)
+    if len(support) < kmax:
+        raise ValueError("cannot draw more distinct words than have a positive weight")
+    weights = weights[support]
+    if len(support) <= 4 * kmax:
+        chosen = _sample_by_keys(rng, len(counts), kmax, weights)
+    else:
+        chosen = _sample_by_rejection(rng, len(counts), kmax, weights)
+    return support[chosen[np.arange(kmax) < counts[:, None]]].astype(np.int32, copy=False)
+
+
+def _sample_by_keys(rng: np.random.Generator, n: int, k: int, weights: np.ndarray) -> np.ndarray:
+    """Efraimidis-Spirakis: the ``k`` largest ``log(u) / w`` keys, in order.
+
+    Costs O(vocabulary) per row, so it is only used for small vocabularies
+    where most words get drawn anyway.
+    """
+    vocab_size = len(weights)
+    rows = max(1, _CHUNK_ELEMENTS // vocab_size)
+    parts = []
+    for start in range(0, n, rows):
+        keys = np.log(rng.random((min(rows, n - start), vocab_size))) / weights
+        top = np.argsort(-keys, axis=1, kind="stable")[:, :k]
+        parts.append(top)
+    return np.concatenate(parts)
+
+
+def _sample_by_rejection(rng: np.random.Generator, n: int, k: int, weights: np.ndarray) -> np.ndarray:
+    """Draw column by column, redrawing the rows that hit an already used word.
+
+    Costs O(k^2) per row independent of the vocabulary size; with at least
+    four words per draw a redraw happens less than a quarter of the time.
+    """
+    uniform = bool((weights == weights[0]).all())
+    cdf = np.cumsum(weights)
+    chosen = np.empty((n, k), dtype=np.int64)
+    for j in range(k):
+        rows = np.arange(n)
+        while rows.size:
+            if uniform:
+                cand = rng.integers(0, len(weights), size=rows.size)
+            else:
+                cand = np.searchsorted(cdf, rng.random(rows.size) * cdf[-1], side="right")
+            clash = (chosen[rows, :j] == cand[:, None]).any(axis=1)
+            chosen[rows[~clash], j] = cand[~clash]
+            rows = rows[clash]
+    return chosen
+
+
+def generate_sequences(n: int, minimum: int, maximum: int, words: Union[Sequence[str], Vocabulary],
+                       word_interval: int,
+                       seed: SeedLike = None) -> SequenceBatch:
+    """Generate ``n`` trials at once with the same distribution as `generate_sequence`.
+
+    Lengths, digits and word draws are made in bulk from an explicit
+    `numpy.random.Generator` (``seed`` may be an int, a Generator or None),
+    so a given seed always reproduces the same batch and the global `random`
+    state is left untouched.
+    """
+    _validate_bounds(minimum, maximum)
+    if word_interval < 1:
+        raise ValueError("word_interval must be >= 1")
+    if n < 0:
+        raise ValueError("n must be >= 0")
+    rng = np.random.default_rng(seed)
+
+    # Duplicated words are kept once, weighted by how often they appear.
+    vocabulary = words if isinstance(words, Vocabulary) else Vocabulary(words)
+
+    lengths = rng.integers(minimum, maximum + 1, size=n)
+    digit_offsets = _offsets(lengths)
+    digits = rng.integers(0, 10, size=int(digit_offsets[-1]), dtype=np.uint8)
+
+    weights = np.asarray(vocabulary.weights, dtype=np.float64)
+    # As in `Vocabulary.sample`, zero-weight words are never drawn.
+    word_counts = np.minimum(lengths // word_interval, int(np.count_nonzero(weights)))
+    word_indices = _sample_words(rng, word_counts, weights)
+
+    return SequenceBatch(
+        vocabulary=vocabulary.words,
+        word_interval=word_interval,
+        digits=digits,
+        digit_offsets=digit_offsets,
+        word_indices=word_indices,
+        word_offsets=_offsets(word_counts),
+    )
+
+
+@dataclass
+class BatchScore:
+    """Vectorized result of `score_batch`, one entry per trial.
+
+    Attributes:
+        correct: bool array, same meaning as the first value of `check_answer`
+        errors: int array, same meaning as the second value of `check_answer`
+        position_ok: optional ``(n, width)`` bool mask; True where the answer
+            item matches the key item (always False past the key's end)
+    """
+    correct: np.ndarray
+    errors: np.ndarray
+    position_ok: Optional[np.ndarray] = None
+
+
+def encode_items(rows: Iterable[Sequence[Any]], vocabulary: Sequence[str],
+                 strict: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode Python item lists (keys or parsed answers) as padded codes.
+
+    Digits 0..9 and words from ``vocabulary`` get their item code; any other
+    value is encoded as `UNKNOWN` (so it never matches), or rejected with
+    ValueError when ``strict`` is set, which is what keys should use.
+    Lookup goes through a dict, so values compare exactly as ``==`` does in
+    `check_answer` (e.g. ``True`` matches the digit 1).
+    """
+    lookup: Dict[Any, int] = {d: d for d in range(10)}
+    for i, w in enumerate(vocabulary):
+        lookup.setdefault(w, WORD_CODE_BASE + i)
+    rows = [list(r) for r in rows]
+    lengths = np.fromiter((len(r) for r in rows), dtype=np.int64, count=len(rows))
+    codes = np.full((len(rows), int(lengths.max(initial=0))), PAD, dtype=np.int32)
+    for i, row in enumerate(rows):
+        for j, value in enumerate(row):
+            try:
+                code = lookup.get(value, UNKNOWN)
+            except TypeError:
+                code = UNKNOWN
+            if code == UNKNOWN and strict:
+                raise ValueError(f"item {value!r} at row {i}, position {j} is not a digit or vocabulary word")
+            codes[i, j] = code
+    return codes, lengths
+
+
+def _as_padded(data: Union[np.ndarray, Tuple[np.ndarray, np.ndarray]],
+               lengths: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Accept a padded 2-D code array or a ragged ``(values, offsets)`` pair."""
+    if isinstance(data, tuple):
+        values, offsets = (np.asarray(a) for a in data)
+        lengths = np.diff(offsets)
+        codes = np.full((len(lengths), int(lengths.max(initial=0))), PAD, dtype=values.dtype)
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        cols = np.arange(len(values)) - np.repeat(offsets[:-1], lengths)
+        codes[rows, cols] = values
+        return codes, lengths
+    codes = np.asarray(data)
+    if codes.ndim != 2:
+        raise ValueError("padded codes must be a 2-D array")
+    if lengths is None:
+        lengths = np.full(len(codes), codes.shape[1], dtype=np.int64)
+    return codes, np.asarray(lengths)
+
+
+def score_batch(keys, answers, key_lengths: Optional[np.ndarray] = None,
+                answer_lengths: Optional[np.ndarray] = None, positions: bool = False) -> BatchScore:
+    """Score many answers against their keys at once, exactly like `check_answer`.
+
+    ``keys`` and ``answers`` are item codes (see `encode_items` and
+    `SequenceBatch.key_codes`), given either as padded 2-D arrays with the
+    matching ``*_lengths`` (defaulting to the full width), or as ragged
+    ``(values, offsets)`` pairs. Key codes must be non-negative.
+
+    As in `check_answer`, missing answer items count as errors, extra answer
+    items are ignored for the error count but make the trial incorrect.
+    """
+    keys, key_lengths = _as_padded(keys, key_lengths)
+    answers, answer_lengths = _as_padded(answers, answer_lengths)
+    if len(keys) != len(answers):
+        raise ValueError("keys and answers must contain the same number of trials")
+
+    width = keys.shape[1]
+    if answers.shape[1] < width:
+        padded = np.full((len(answers), width), UNKNOWN, dtype=answers.dtype)
+        padded[:, :answers.shape[1]] = answers
+        answers = padded
+    else:
+        answers = answers[:, :width]
+
+    col = np.arange(width)
+    ok = (answers == keys) & (col < np.minimum(key_lengths, answer_lengths)[:, None])
+    errors = key_lengths - ok.sum(axis=1)
+    correct = (errors == 0) & (answer_lengths == key_lengths)
+    return BatchScore(correct=correct, errors=errors, position_ok=ok if positions else None)
+
+
+__all__ = ["SequenceBatch", "generate_sequences", "BatchScore", "encode_items", "score_batch",
+           "WORD_CODE_BASE", "PAD", "UNKNOWN"]
@@ -5,9 +5,13 @@ interfaces (terminal, GUI, web). It is intentionally small and well-typed
 so neuroscientists or researchers can script experiments over it.
 """
 
+from bisect import bisect_right
 from dataclasses import dataclass, asdict
+from collections import Counter
+from itertools import accumulate
 import random
-from typing import List, Tuple, Sequence, Dict, Any
+import sys
+from typing import List, Tuple, Sequence, Dict, Any, Optional, Iterable, Iterator, Union
 
 
 # Default vocabulary used by the game. Can be overridden by a caller.
@@ -39,6 +43,117 @@ class RoundResult:
     metadata: Dict[str, Any]
 
 
+def normalize_word(token: str) -> str:
+    """Canonical form used to match typed answers: case-folded, single spaces."""
+    return " ".join(token.split()).casefold()
+
+
+class Vocabulary:
+    """A word list prepared once for repeated sampling and lookups.
+
+    Words are deduplicated (keeping first-seen order) and interned. A word
+    listed several times gets proportionally more weight, which is exactly
+    how a plain list with repeats behaves in `generate_sequence`; explicit
+    ``weights`` (e.g. word frequencies) add up the same way. Words whose
+    weight is zero are still recognized by `lookup` but never drawn.
+
+    Build one and pass it instead of a list to avoid redoing this work on
+    every `generate_sequence` call.
+    """
+
+    __slots__ = ("words", "weights", "_index", "_normalized", "_uniform", "_cumulative")
+
+    def __init__(self, words: Iterable[str], weights: Optional[Iterable[float]] = None):
+        if weights is None:
+            totals = Counter(map(sys.intern, words))
+        else:
+            totals = {}
+            for word, weight in zip(words, weights):
+                if weight < 0:
+                    raise ValueError("word weights must be >= 0")
+                word = sys.intern(word)
+                totals[word] = totals.get(word, 0) + weight
+        self.words: Tuple[str, ...] = tuple(totals)
+        self.weights: Tuple[float, ...] = tuple(totals.values())
+        self._index = dict(zip(self.words, range(len(self.words))))
+        # All-zero weights take the weighted path, which draws nothing.
+        self._uniform = len(set(self.weights)) <= 1 and all(w > 0 for w in self.weights[:1])
+        # Only needed by `lookup` and weighted sampling; built on first use.
+        self._normalized: Optional[Dict[str, str]] = None
+        self._cumulative: Optional[List[float]] = None
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.words)
+
+    def __contains__(self, word: object) -> bool:
+        return word in self._index
+
+    def __getitem__(self, i: int) -> str:
+        return self.words[i]
+
+    def index(self, word: str) -> int:
+        """Return the position of `word`; raises KeyError if it isn't in the vocabulary."""
+        return self._index[word]
+
+    def lookup(self, token: str) -> Optional[str]:
+        """Return the vocabulary word matching a typed `token`, ignoring case and spacing."""
+        if self._normalized is None:
+            normalized: Dict[str, str] = {}
+            for w in self.words:
+                normalized.setdefault(normalize_word(w), w)
+            self._normalized = normalized
+        return self._normalized.get(normalize_word(token))
+
+    def sample(self, k: int, rng=None) -> List[str]:
+        """Draw `k` distinct words (at most all of them), in draw order.
+
+        Each draw picks among the words not drawn yet, proportionally to
+        their weight. Uniform vocabularies use a partial Fisher-Yates shuffle
+        over a sparse swap table: O(1) per draw, no copy of the word list.
+        """
+        if rng is None:
+            rng = random
+        n = len(self.words)
+        k = min(k, n)
+        if self._uniform:
+            swapped: Dict[int, int] = {}
+            out = []
+            for i in range(k):
+                j = rng.randrange(i, n)
+                out.append(self.words[swapped.get(j, j)])
+                swapped[j] = swapped.get(i, i)
+            return out
+        return [self.words[i] for i in self._sample_weighted(k, rng)]
+
+    def _sample_weighted(self, k: int, rng) -> List[int]:
+        # Rejection against the cumulative weights is O(log n) per try; when a
+        # few heavy words are used up and tries keep failing, fall back to a
+        # linear pass over what is left. Both draw exactly by remaining weight.
+        if self._cumulative is None:
+            self._cumulative = list(accumulate(self.weights))
+        total = self._cumulative[-1] if self._cumulative else 0
+        used: Dict[int, None] = {}
+        while len(used) < k:
+            for _ in range(32):
+                i = min(bisect_right(self._cumulative, rng.random() * total), len(self.words) - 1)
+                if i not in used and self.weights[i] > 0:
+                    break
+            else:
+                remaining = [j for j in range(len(self.words)) if j not in used and self.weights[j] > 0]
+                if not remaining:
+                    break
+                x = rng.random() * sum(self.weights[j] for j in remaining)
+                for i in remaining:
+                    x -= self.weights[i]
+                    if x < 0:
+                        break
+            used[i] = None
+        return list(used)
+
+
 def _validate_bounds(minimum: int, maximum: int) -> None:
     if minimum < 1:
         raise ValueError("minimum must be >= 1")
@@ -46,70 +161,168 @@ def _validate_bounds(minimum: int, maximum: int) -> None:
         raise ValueError("maximum must be >= minimum")
 
 
-def generate_sequence(minimum: int, maximum: int, words: Sequence[str], word_interval: int) -> Tuple[List[Any], List[Any]]:
+def generate_sequence(minimum: int, maximum: int, words: Union[Sequence[str], Vocabulary], word_interval: int,
+                      rng: Optional[random.Random] = None) -> Tuple[List[Any], List[Any]]:
     """Generate a mixed sequence of single-digit numbers with occasional words.
 
     The function returns a tuple (sequence, answer_key). The sequence contains
     integers from 0..9 and, at every ``word_interval``-th numeric item, a word
-    selected without repetition until the vocabulary is exhausted.
+    selected without repetition until the vocabulary is exhausted. ``words``
+    may be a plain list or a prebuilt `Vocabulary`.
+
+    A plain list is drawn from exactly as before `Vocabulary` existed (one
+    ``rng.choice`` over the unused words per slot), so seeded sequences stay
+    reproducible; that costs O(len(words)) per word. A `Vocabulary` draws in
+    O(1) per word but consumes the generator differently: the same seed
+    yields different words than with the equivalent list.
 
     This function is deterministic in type but non-deterministic in values
     because it uses random sampling; callers should set the random seed if
-    reproducibility is required for experiments.
+    reproducibility is required for experiments, or pass their own seeded
+    ``rng`` (a `random.Random`) instead of using the global generator.
     """
     _validate_bounds(minimum, maximum)
     if word_interval < 1:
         raise ValueError("word_interval must be >= 1")
 
-    length = random.randint(minimum, maximum)
-    digits = [random.randint(0, 9) for _ in range(length)]
+    if rng is None:
+        rng = random
+    length = rng.randint(minimum, maximum)
+    digits = [rng.randint(0, 9) for _ in range(length)]
+    if isinstance(words, Vocabulary):
+        chosen = iter(words.sample(length // word_interval, rng))
+    else:
+        chosen = iter(_sample_list(words, length // word_interval, rng))
 
     sequence: List[Any] = []
-    key: List[Any] = []
-    used_words: List[str] = []
-
     for idx, num in enumerate(digits):
         sequence.append(num)
-        key.append(num)
         if (idx + 1) % word_interval == 0:
-            choices = [w for w in words if w not in used_words]
-            if choices:
-                word = random.choice(choices)
-                used_words.append(word)
+            word = next(chosen, None)
+            if word is not None:
                 sequence.append(word)
-                key.append(word)
 
-    return sequence, key
+    return sequence, list(sequence)
+
 
+def _sample_list(words: Sequence[str], k: int, rng) -> List[str]:
+    # The original draw order: repeats weigh more until their first draw.
+    remaining = list(words)
+    out = []
+    for _ in range(k):
+        if not remaining:
+            break
+        word = rng.choice(remaining)
+        out.append(word)
+        remaining = [w for w in remaining if w != word]
+    return out
 
-def convert_user_input(raw: str) -> List[Any]:
+
+class AnswerParseError(ValueError):
+    """A token of an answer could not be parsed.
+
+    Attributes:
+        line: 1-based line number (1 for `convert_user_input`)
+        column: 0-based offset of the token within the line
+        token: the offending token, stripped
+    """
+
+    def __init__(self, message: str, line: int, column: int, token: str):
+        super().__init__(f"line {line}, column {column}: {message}: {token!r}")
+        self.line = line
+        self.column = column
+        self.token = token
+
+
+# Fast path for the overwhelmingly common tokens.
+_ASCII_DIGITS = {str(d): d for d in range(10)}
+
+
+def _parse_line(raw: str, vocabulary: Optional[Vocabulary], line: int) -> List[Any]:
+    # One split, one strip per token; `offset` tracks the token's column for errors.
+    parsed: List[Any] = []
+    offset = 0
+    for part in raw.split(","):
+        token = part.strip()
+        if token:
+            value = _ASCII_DIGITS.get(token)
+            if value is None:
+                if token.isdigit():
+                    # isdigit() also accepts e.g. superscripts, which int() rejects.
+                    try:
+                        value = int(token)
+                    except ValueError:
+                        column = offset + len(part) - len(part.lstrip())
+                        raise AnswerParseError("not a decimal number", line, column, token) from None
+                elif vocabulary is not None:
+                    value = vocabulary.lookup(token) or token
+                else:
+                    value = token
+            parsed.append(value)
+        offset += len(part) + 1
+    return parsed
+
+
+def convert_user_input(raw: str, vocabulary: Optional[Vocabulary] = None) -> List[Any]:
     """Parse a user-provided CSV-like string into a list of ints/strings.
 
     Example: "1, 2, apple" -> [1, 2, 'apple']
+
+    With a `vocabulary`, words are matched ignoring case and extra spaces and
+    replaced by the vocabulary's spelling ("  Ugli   FRUIT" -> 'ugli fruit');
+    unknown words are kept as typed. Tokens made of digits that are not
+    decimal numbers (e.g. "²") raise `AnswerParseError`.
     """
-    parts = [p.strip() for p in raw.split(",") if p.strip()]
-    parsed: List[Any] = [int(p) if p.isdigit() else p for p in parts]
-    return parsed
+    return _parse_line(raw, vocabulary, 1)
+
 
+def parse_answers(lines: Iterable[str], vocabulary: Optional[Vocabulary] = None,
+                  errors: str = "raise") -> Iterator[Any]:
+    """Parse answers one per line, lazily; accepts any iterable of lines or a text file.
 
-def check_answer(user: List[Any], key: List[Any]) -> Tuple[bool, int, List[Tuple[Any, Any, bool]]]:
+    Yields one list per line, equal to what `convert_user_input` returns for
+    it (blank lines give ``[]``). With ``errors="raise"`` a bad token raises
+    `AnswerParseError`; with ``errors="yield"`` the error is yielded in place
+    of that line's answer and parsing continues.
+    """
+    if errors not in ("raise", "yield"):
+        raise ValueError("errors must be 'raise' or 'yield'")
+    for number, raw in enumerate(lines, 1):
+        try:
+            yield _parse_line(raw, vocabulary, number)
+        except AnswerParseError as exc:
+            if errors == "raise":
+                raise
+            yield exc
+
+
+def check_answer(user: List[Any], key: List[Any],
+                 details: bool = True) -> Tuple[bool, int, Optional[List[Tuple[Any, Any, bool]]]]:
     """Compare `user` against `key` and return (correct, errors, details).
 
     - `correct` is True only if lengths match and there are no mismatches.
     - `errors` is the count of mismatches.
     - `details` is a list of tuples (user_value, key_value, is_correct) for each position.
+
+    Pass ``details=False`` when only the score is needed; the per-position
+    list is then not built and None is returned in its place.
     """
+    if not details:
+        errors = sum(1 for u, k in zip(user, key) if not (u == k))
+        errors += max(len(key) - len(user), 0)
+        return errors == 0 and len(user) == len(key), errors, None
+
     errors = 0
-    details: List[Tuple[Any, Any, bool]] = []
+    rows: List[Tuple[Any, Any, bool]] = []
     for i in range(len(key)):
         u = user[i] if i < len(user) else None
         is_ok = (u == key[i])
-        details.append((u if u is not None else "----", key[i], is_ok))
+        rows.append((u if u is not None else "----", key[i], is_ok))
         if not is_ok:
             errors += 1
 
     correct = (errors == 0 and len(user) == len(key))
-    return correct, errors, details
+    return correct, errors, rows
 
 
 def difficulty_presets() -> Dict[str, Dict[str, int]]:
@@ -125,4 +338,5 @@ def difficulty_presets() -> Dict[str, Dict[str, int]]:
     }
 
 
-__all__ = ["WORDS", "generate_sequence", "convert_user_input", "check_answer", "RoundResult", "difficulty_presets"]
+__all__ = ["WORDS", "Vocabulary", "normalize_word", "generate_sequence", "convert_user_input", "parse_answers",
+           "AnswerParseError", "check_answer", "RoundResult", "difficulty_presets"]
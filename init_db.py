@@ -1,22 +1,17 @@
-import sqlite3
 from pathlib import Path
 
+import schema
+
 DB_PATH = Path(__file__).with_name("log.db")
 
 def init_db(path: Path):
-    conn = sqlite3.connect(path)
-    cur = conn.cursor()
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS logs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        timestamp TEXT NOT NULL DEFAULT (datetime('now')),
-        level TEXT,
-        message TEXT
-    )
-    """)
-    conn.commit()
-    conn.close()
+    """Create the database or bring it up to the current schema version."""
+    conn = schema.connect(path)
+    try:
+        schema.migrate(conn)
+    finally:
+        conn.close()
 
 if __name__ == '__main__':
     init_db(DB_PATH)
-    print(f"Created/initialized database at {DB_PATH.resolve()}")
+    print(f"Created/initialized database at {DB_PATH.resolve()} (schema version {schema.SCHEMA_VERSION})")
@@ -0,0 +1,153 @@
+"""Load test for `server.py`: concurrent keep-alive clients against localhost.
+
+Each client opens one connection and sends requests back to back for the
+given duration, cycling through a mix of static and API requests. Reports
+requests/sec and latency percentiles per request kind and overall.
+
+The in-process server logs to a temporary database unless ``--db`` is given,
+so load-test rounds never reach the real log.db.
+
+Usage:
+    python loadtest.py --clients 50 --duration 10            # starts its own server
+    python loadtest.py --url http://127.0.0.1:8000 --clients 50
+"""
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+import tempfile
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import logger_sqlite
+import server
+
+KEY = [3, "apple", 7, 1, "kiwi", 9]
+REQUESTS = {
+    "static": ("GET", "/assets/js/game_controller.js", None),
+    "presets": ("GET", "/api/presets", None),
+    "sequence": ("GET", "/api/sequence?level=3", None),
+    "check": ("POST", "/api/check", {"answer": "3, Apple, 7, 2, kiwi, 9", "key": KEY}),
+    "check_batch": ("POST", "/api/check/batch", {"rounds": [{"answer": KEY, "key": KEY}] * 50}),
+}
+
+
+def _encode(method: str, path: str, payload, host: str) -> bytes:
+    body = json.dumps(payload).encode() if payload is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nAccept-Encoding: br, gzip\r\n"
+    if body:
+        head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+    return (head + "\r\n").encode() + body
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return status
+
+
+async def _client(host: str, port: int, kinds: List[str], deadline: float,
+                  samples: Dict[str, List[float]], failures: Dict[str, int], offset: int):
+    reader, writer = await asyncio.open_connection(host, port)
+    requests = [(kind, _encode(*REQUESTS[kind], host)) for kind in kinds]
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            kind, raw = requests[i % len(requests)]
+            i += 1
+            start = time.perf_counter()
+            writer.write(raw)
+            status = await _read_response(reader)
+            samples[kind].append(time.perf_counter() - start)
+            if status != 200:
+                failures[kind] += 1
+    finally:
+        writer.close()
+
+
+def _percentile(sorted_samples: List[float], q: float) -> float:
+    return sorted_samples[min(len(sorted_samples) - 1, int(q * len(sorted_samples)))]
+
+
+async def run(url: Optional[str], clients: int, duration: float, kinds: List[str],
+              db: Path = None) -> Dict[str, Dict[str, float]]:
+    """Run the load test and return {kind: {requests, rps, p50_ms, p99_ms, failures}} plus "all".
+
+    Without `url` a server is started in-process, writing to `db` or, by
+    default, to a temporary database removed afterwards.
+    """
+    server_task = None
+    scratch = None
+    if url is None:
+        if db is None:
+            scratch = tempfile.TemporaryDirectory(prefix="loadtest-")
+            db = Path(scratch.name) / "log.db"
+        ready = asyncio.Event()
+        port = 18765
+        server_task = asyncio.create_task(server.serve("127.0.0.1", port, ready=ready, db=db))
+        await ready.wait()
+        host = "127.0.0.1"
+    else:
+        parts = urlsplit(url)
+        host, port = parts.hostname, parts.port or 80
+
+    samples = {kind: [] for kind in kinds}
+    failures = {kind: 0 for kind in kinds}
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(_client(host, port, kinds, start + duration, samples, failures, c)
+                               for c in range(clients)))
+        elapsed = time.perf_counter() - start
+    finally:
+        if server_task is not None:
+            server_task.cancel()
+        if scratch is not None:
+            logger_sqlite.close()  # stop the writer before its database is deleted
+            scratch.cleanup()
+
+    results = {}
+    everything = sorted(s for kind in kinds for s in samples[kind])
+    for kind, data in [*((k, sorted(samples[k])) for k in kinds), ("all", everything)]:
+        if not data:
+            continue
+        results[kind] = {
+            "requests": len(data),
+            "rps": len(data) / elapsed,
+            "p50_ms": _percentile(data, 0.50) * 1e3,
+            "p99_ms": _percentile(data, 0.99) * 1e3,
+            "failures": sum(failures.values()) if kind == "all" else failures[kind],
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test server.py with concurrent keep-alive clients.")
+    parser.add_argument("--url", default=None, help="running server to test (default: start one in-process)")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--kinds", default=",".join(REQUESTS),
+                        help=f"comma-separated request kinds out of {', '.join(REQUESTS)}")
+    parser.add_argument("--db", default=None,
+                        help="log database of the in-process server (default: a temporary one)")
+    args = parser.parse_args(argv)
+
+    kinds = args.kinds.split(",")
+    results = asyncio.run(run(args.url, args.clients, args.duration, kinds, args.db and Path(args.db)))
+    print(f"{args.clients} clients, {args.duration:.0f}s")
+    for kind, r in results.items():
+        print(f"  {kind:<12} {r['requests']:>8} req  {r['rps']:>9,.0f} req/s  p50 {r['p50_ms']:>7.2f} ms  "
+              f"p99 {r['p99_ms']:>7.2f} ms  failures {r['failures']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Retention, archiving and compaction for the `logs` table of log.db.
+
+A `RetentionPolicy` combines a maximum age, a maximum number of rows and
+per-level time-to-live values (e.g. keep DEBUG lines for 7 days, everything
+else for 90). `prune` deletes matching rows oldest first in small batches,
+each in its own short transaction, so the game and other writers are never
+locked out for long. Pruned rows can be archived to gzip-compressed JSON
+Lines segment files before they are deleted.
+
+`compact` returns freed pages to the filesystem with `incremental_vacuum`
+(or a full `VACUUM` when the database was created without incremental
+auto-vacuum), and `run_maintenance` / `start_scheduler` run both on a
+schedule, remembering when the last full VACUUM happened.
+
+Usage:
+    python log_retention.py --max-age-days 90 --ttl DEBUG=7 --archive-dir log_archive
+"""
+
+import argparse
+from dataclasses import dataclass, field
+import gzip
+import json
+import os
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+import logger_sqlite
+import schema
+
+BATCH_SIZE = 2000
+# Pause between delete batches so queued log writes get the lock in between.
+BATCH_PAUSE = 0.01
+# Pages given back per `incremental_vacuum` call during maintenance.
+VACUUM_PAGES = 2000
+
+
+@dataclass
+class RetentionPolicy:
+    """Which log rows to keep.
+
+    Attributes:
+        max_age_days: delete rows older than this (None = no age limit)
+        max_rows: keep at most this many of the newest rows (None = no limit)
+        level_ttl_days: per-level maximum age, e.g. {"DEBUG": 7} (any case)
+    """
+    max_age_days: Optional[float] = None
+    max_rows: Optional[int] = None
+    level_ttl_days: Dict[str, float] = field(default_factory=dict)
+
+
+def _connect(db: Path) -> sqlite3.Connection:
+    conn = logger_sqlite._connect(db)
+    # Brings in the `maintenance` table on databases that predate it.
+    schema.migrate(conn)
+    return conn
+
+
+def _expired_condition(conn: sqlite3.Connection, policy: RetentionPolicy):
+    """Build the WHERE clause selecting every row the policy says to drop."""
+    clauses, params = [], []
+    if policy.max_age_days is not None:
+        clauses.append("timestamp < datetime('now', ?)")
+        params.append(f"-{policy.max_age_days} days")
+    for level, days in policy.level_ttl_days.items():
+        clauses.append("(level = ? AND timestamp < datetime('now', ?))")
+        params.extend([level.upper(), f"-{days} days"])
+    if policy.max_rows is not None:
+        # Resolve the cut-off once so later batches don't shift it.
+        row = conn.execute("SELECT id FROM logs ORDER BY id DESC LIMIT 1 OFFSET ?",
+                           (policy.max_rows,)).fetchone()
+        if row is not None:
+            clauses.append("id <= ?")
+            params.append(row[0])
+    return " OR ".join(clauses), params
+
+
+def prune(policy: RetentionPolicy, path: Path = None, archive_dir: Path = None,
+          batch_size: int = BATCH_SIZE) -> int:
+    """Delete the log rows `policy` does not keep; return how many were deleted.
+
+    With `archive_dir`, rows are first appended to a new
+    ``logs-<UTC time>.jsonl.gz`` segment there, synced to disk before the
+    batch is deleted.
+    """
+    db = logger_sqlite._db_path(path)
+    logger_sqlite.flush(db)
+    conn = _connect(db)
+    archive = None
+    deleted = 0
+    try:
+        condition, params = _expired_condition(conn, policy)
+        if not condition:
+            return 0
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                f"SELECT id, timestamp, level, message FROM logs WHERE id > ? AND ({condition}) "
+                f"ORDER BY id LIMIT ?",
+                (last_id, *params, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+            if archive_dir is not None:
+                if archive is None:
+                    Path(archive_dir).mkdir(parents=True, exist_ok=True)
+                    name = time.strftime("logs-%Y%m%dT%H%M%SZ.jsonl.gz", time.gmtime())
+                    archive = gzip.open(Path(archive_dir) / name, "at", encoding="utf-8")
+                archive.writelines(
+                    json.dumps({"id": r[0], "timestamp": r[1], "level": r[2], "message": r[3]}) + "\n"
+                    for r in rows
+                )
+                archive.flush()
+                os.fsync(archive.fileno())
+            with conn:
+                conn.executemany("DELETE FROM logs WHERE id = ?", ((r[0],) for r in rows))
+            deleted += len(rows)
+            last_id = rows[-1][0]
+            if len(rows) < batch_size:
+                break
+            time.sleep(BATCH_PAUSE)
+    finally:
+        if archive is not None:
+            archive.close()
+        conn.close()
+    return deleted
+
+
+def compact(path: Path = None, pages: Optional[int] = VACUUM_PAGES, full: bool = False):
+    """Give free pages back to the filesystem.
+
+    Runs `PRAGMA incremental_vacuum(pages)` (all free pages if `pages` is
+    None), which is cheap and only touches free pages. A full `VACUUM` is
+    run when `full` is set or when the database isn't in incremental
+    auto-vacuum mode yet (it switches it over, once).
+    """
+    db = logger_sqlite._db_path(path)
+    logger_sqlite.flush(db)
+    conn = _connect(db)
+    try:
+        incremental = conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        if full or not incremental:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO maintenance (key, value) VALUES ('last_vacuum', ?)",
+                             (str(time.time()),))
+        else:
+            # executescript steps the pragma to completion; execute() stops
+            # after the first freed page.
+            conn.executescript("PRAGMA incremental_vacuum" if pages is None
+                               else f"PRAGMA incremental_vacuum({int(pages)})")
+    finally:
+        conn.close()
+
+
+def run_maintenance(policy: RetentionPolicy, path: Path = None, archive_dir: Path = None,
+                    full_vacuum_days: float = 7) -> int:
+    """Prune, then compact; a full VACUUM runs at most every `full_vacuum_days`.
+
+    Returns the number of pruned rows.
+    """
+    db = logger_sqlite._db_path(path)
+    deleted = prune(policy, db, archive_dir)
+    conn = _connect(db)
+    try:
+        row = conn.execute("SELECT value FROM maintenance WHERE key = 'last_vacuum'").fetchone()
+    finally:
+        conn.close()
+    due = row is None or time.time() - float(row[0]) > full_vacuum_days * 86400
+    compact(db, full=due)
+    return deleted
+
+
+def start_scheduler(policy: RetentionPolicy, interval: float = 3600, path: Path = None,
+                    archive_dir: Path = None) -> threading.Event:
+    """Run `run_maintenance` every `interval` seconds in a daemon thread.
+
+    Returns an Event; set it to stop the scheduler.
+    """
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            try:
+                deleted = run_maintenance(policy, path, archive_dir)
+                if deleted:
+                    logger_sqlite.log("Retention pruned %d log rows", deleted, level="INFO", path=path)
+            except Exception:
+                logger_sqlite.log("Log maintenance failed", level="ERROR", path=path)
+
+    threading.Thread(target=loop, name="log-retention", daemon=True).start()
+    return stop
+
+
+def _parse_ttl(value: str):
+    level, _, days = value.partition("=")
+    if not days:
+        raise argparse.ArgumentTypeError("expected LEVEL=DAYS, e.g. DEBUG=7")
+    return level.upper(), float(days)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prune, archive and compact the logs table.")
+    parser.add_argument("--db", default=None, help="database path (defaults to log.db next to this script)")
+    parser.add_argument("--max-age-days", type=float, default=None)
+    parser.add_argument("--max-rows", type=int, default=None)
+    parser.add_argument("--ttl", type=_parse_ttl, action="append", default=[], metavar="LEVEL=DAYS",
+                        help="per-level retention, may be repeated")
+    parser.add_argument("--archive-dir", default=None, help="write pruned rows to .jsonl.gz segments here")
+    parser.add_argument("--full-vacuum", action="store_true", help="run a full VACUUM after pruning")
+    args = parser.parse_args(argv)
+
+    policy = RetentionPolicy(args.max_age_days, args.max_rows, dict(args.ttl))
+    deleted = prune(policy, args.db, args.archive_dir)
+    compact(args.db, full=args.full_vacuum)
+    print(f"Pruned {deleted} log rows.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,53 @@
+import atexit
+import itertools
+import os
 import sqlite3
 from pathlib import Path
 import threading
-import traceback
+import time
+
+import metrics
+
+# `json`, `queue`, `schema`, `round_codec` and `round_journal` are imported at
+# first use: `basic` imports this module at startup, before any of them is needed.
 
 DB_NAME = "log.db"
 _lock = threading.Lock()
 
+# Writes are handed to a background thread per database which keeps one
+# long-lived connection open and commits in batches: either when BATCH_SIZE
+# entries are pending or FLUSH_INTERVAL seconds after the first pending entry.
+BATCH_SIZE = 256
+FLUSH_INTERVAL = 0.25
+QUEUE_SIZE = 10000
+# Every process has its own writer and WAL connection; when several processes
+# share one database a batch that still finds it locked after `busy_timeout`
+# is retried with exponential backoff before falling back to stdout.
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05
+
+# Minimum level written to the database; lower levels return immediately,
+# before any formatting or I/O. Unknown level names are always written.
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+_min_level = LEVELS.get(os.environ.get("STM_LOG_LEVEL", "DEBUG").upper(), 10)
+
+# With STM_ROUND_JOURNAL=1 (or `set_round_journal`), `save_round` only appends
+# to this process's `round_journal` file; rounds reach SQLite in bulk when the
+# journal is replayed (on flush, close, the next init_db, or in the background
+# once it grows past JOURNAL_REPLAY_BYTES). Rounds whose SQLite write fails
+# are journaled in either mode instead of being lost.
+JOURNAL_REPLAY_BYTES = 1 << 20
+_journal_rounds = os.environ.get("STM_ROUND_JOURNAL", "").lower() in ("1", "true", "yes", "on")
+
+_writers = {}
+_journals = {}
+_replaying = set()
+_readers = threading.local()
+_STOP = object()
+# Fingerprints of the vocabularies each writing connection has committed, so
+# `_insert_round` stores a vocabulary once instead of with every round.
+_stored_vocabularies = {}
+
 
 def _db_path(path: Path = None) -> Path:
     if path:
@@ -13,97 +55,889 @@ def _db_path(path: Path = None) -> Path:
     return Path(__file__).with_name(DB_NAME)
 
 
+def _connect(db: Path) -> sqlite3.Connection:
+    """Open a connection in WAL mode so readers never block the writer (see `schema.connect`)."""
+    import schema
+
+    return schema.connect(db)
+
+
+def _print_exc():
+    # Only error paths need `traceback`; importing it lazily keeps startup fast.
+    import traceback
+
+    traceback.print_exc()
+
+
+def _is_busy(exc: sqlite3.OperationalError) -> bool:
+    message = str(exc)
+    return "locked" in message or "busy" in message
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """False if `exc` is SQLite rejecting the row itself, which would fail again on a retry."""
+    if isinstance(exc, sqlite3.OperationalError):
+        return _is_busy(exc)
+    return not isinstance(exc, sqlite3.Error)
+
+
+def _transaction(conn: sqlite3.Connection, entries):
+    """Apply `entries` in one write transaction, retrying while another process holds the lock.
+
+    `BEGIN IMMEDIATE` takes the write lock up front, so waiting happens in
+    SQLite's busy handler (`busy_timeout`) rather than failing mid-batch.
+    """
+    for attempt in range(BUSY_RETRIES + 1):
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # Runs of the same statement go through one executemany, so
+                # the lock is held for as little Python work as possible.
+                for op, group in itertools.groupby(entries, key=lambda entry: entry[0]):
+                    if callable(op):
+                        for _op, params, _fallback in group:
+                            op(conn, params)
+                    else:
+                        conn.executemany(op, [params for _op, params, _fallback in group])
+            return
+        except BaseException as exc:
+            # Rolled back: vocabularies this attempt stored are gone again.
+            _stored_vocabularies.pop(conn, None)
+            if attempt == BUSY_RETRIES or not isinstance(exc, sqlite3.OperationalError) or not _is_busy(exc):
+                raise
+            metrics.count("sqlite.busy_retries")
+            time.sleep(BUSY_BACKOFF * 2 ** attempt)
+
+
+class _Writer:
+    """Background thread draining a bounded queue of writes into one database."""
+
+    def __init__(self, db: Path):
+        import queue
+
+        self.db = db
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        # Time callers spend handing an entry over (only > 0 when the queue is full).
+        self.enqueued = 0
+        self.enqueue_total = 0.0
+        self.enqueue_max = 0.0
+        self.thread = threading.Thread(target=self._run, name=f"sqlite-writer:{db.name}", daemon=True)
+        self.thread.start()
+
+    def submit(self, op, params: tuple, fallback):
+        """Queue one write; `fallback(exc)` is called with the error if it can't be written.
+
+        `op` is either an SQL statement or a callable `op(conn, params)` for
+        writes spanning several statements, which then share a transaction.
+        """
+        start = time.perf_counter()
+        self.queue.put((op, params, fallback))
+        self._record(time.perf_counter() - start)
+
+    async def asubmit(self, op, params: tuple, fallback):
+        """Like `submit`, but awaits instead of blocking when the queue is full."""
+        import asyncio  # already loaded whenever this coroutine runs
+        import queue
+
+        entry = (op, params, fallback)
+        start = time.perf_counter()
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, self.queue.put, entry)
+        self._record(time.perf_counter() - start)
+
+    def _record(self, elapsed: float):
+        metrics.observe("sqlite.enqueue", elapsed)
+        self.enqueued += 1
+        self.enqueue_total += elapsed
+        if elapsed > self.enqueue_max:
+            self.enqueue_max = elapsed
+
+    def flush(self):
+        """Block until everything queued so far has been committed."""
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait()
+
+    def stop(self):
+        self.queue.put(_STOP)
+        self.thread.join()
+
+    def _run(self):
+        import queue
+
+        conn = None
+        stopping = False
+        while not stopping:
+            batch = []
+            waiters = []
+            item = self.queue.get()
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= BATCH_SIZE:
+                    break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    if conn is None:
+                        conn = _connect(self.db)
+                        conn.isolation_level = None  # transactions are explicit, see _transaction
+                    with metrics.span("sqlite.write_batch"):
+                        self._write(conn, batch)
+                    metrics.count("sqlite.rows", len(batch))
+                except Exception as exc:
+                    metrics.count("sqlite.fallbacks", len(batch))
+                    for _op, _params, fallback in batch:
+                        fallback(exc)
+                    _print_exc()
+            for event in waiters:
+                event.set()
+        if conn is not None:
+            _stored_vocabularies.pop(conn, None)
+            conn.close()
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, batch):
+        try:
+            _transaction(conn, batch)
+            return
+        except sqlite3.Error:
+            metrics.count("sqlite.failed_batches")
+        # Something in the batch failed and the transaction was rolled back;
+        # retry row by row so one bad entry doesn't lose its neighbours.
+        for entry in batch:
+            try:
+                _transaction(conn, [entry])
+            except sqlite3.Error as exc:
+                metrics.count("sqlite.fallbacks")
+                entry[2](exc)
+                _print_exc()
+
+
+def _writer(db: Path) -> _Writer:
+    with _lock:
+        writer = _writers.get(db)
+        if writer is None:
+            writer = _writers[db] = _Writer(db)
+        return writer
+
+
+def _reader(db: Path) -> sqlite3.Connection:
+    """Return this thread's long-lived read connection for `db`."""
+    conns = getattr(_readers, "conns", None)
+    if conns is None:
+        conns = _readers.conns = {}
+    conn = conns.get(db)
+    if conn is None:
+        conn = conns[db] = _connect(db)
+    return conn
+
+
+def _round_columns(metadata: dict, data: dict):
+    """Split a round payload into typed `rounds` columns and `round_items` rows."""
+    items = data.get("items")
+    answer = data.get("answer") or []
+    details = data.get("details") or []
+    item_rows = []
+    for pos, (user_value, key_value, ok) in enumerate(details):
+        if pos >= len(answer):
+            user_value = None  # `check_answer` reports missing items as "----"
+        item_rows.append((pos, user_value, key_value, int(bool(ok))))
+
+    difficulty = metadata.get("difficulty")
+    item_count = metadata.get("items", len(items) if items is not None else None)
+    correct = data.get("correct")
+    errors = metadata.get("errors")
+    if errors is None and details:
+        errors = sum(1 for row in item_rows if not row[3])
+    columns = (
+        None if difficulty is None else str(difficulty),
+        item_count,
+        metadata.get("time"),
+        None if correct is None else int(bool(correct)),
+        errors,
+        None if metadata.get("participant") is None else str(metadata["participant"]),
+    )
+    return columns, item_rows
+
+
+def _insert_items(conn, round_id: int, item_rows):
+    conn.executemany(
+        "INSERT INTO round_items (round_id, position, user_value, key_value, is_correct) VALUES (?, ?, ?, ?, ?)",
+        [(round_id, *row) for row in item_rows],
+    )
+
+
+# The materialized aggregates (see `schema`) are updated by `_insert_round` in
+# the same transaction as the round itself.
+def _update_stats(conn, round_id: int, columns: tuple, item_rows):
+    difficulty, item_count, elapsed, correct, errors, participant = columns
+    key = (participant or "", difficulty or "")
+    errors = errors or 0
+    conn.execute(
+        """
+        INSERT INTO round_stats
+        VALUES (?, ?, (SELECT date(timestamp) FROM rounds WHERE id = ?), 1, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (participant, difficulty, day) DO UPDATE SET
+            rounds = rounds + 1,
+            correct = correct + excluded.correct,
+            items = items + excluded.items,
+            errors = errors + excluded.errors,
+            errors_sq = errors_sq + excluded.errors_sq,
+            timed = timed + excluded.timed,
+            elapsed = elapsed + excluded.elapsed,
+            elapsed_sq = elapsed_sq + excluded.elapsed_sq
+        """,
+        (*key, round_id, correct or 0, item_count or 0, errors, errors * errors,
+         int(elapsed is not None), elapsed or 0.0, (elapsed or 0.0) ** 2),
+    )
+    conn.executemany(
+        """
+        INSERT INTO position_stats VALUES (?, ?, ?, 1, ?)
+        ON CONFLICT (participant, difficulty, position) DO UPDATE SET
+            trials = trials + 1,
+            errors = errors + excluded.errors
+        """,
+        [(*key, pos, 1 - ok) for pos, _, _, ok in item_rows],
+    )
+
+
 def init_db(path: Path = None):
-    """Create the log database and table if it doesn't exist."""
+    """Create the log database or bring its schema up to date (see `schema`)."""
     db = _db_path(path)
     try:
         with _lock:
-            conn = sqlite3.connect(db)
-            cur = conn.cursor()
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL DEFAULT (datetime('now')),
-                    level TEXT,
-                    message TEXT
-                )
-                """
-            )
-            # Create a table to store structured round data for experiments
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS rounds (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL DEFAULT (datetime('now')),
-                    meta TEXT,
-                    data TEXT
-                )
-                """
-            )
-            conn.commit()
-            conn.close()
+            conn = _connect(db)
+            try:
+                import schema
+
+                schema.migrate(conn)
+            finally:
+                conn.close()
+        # Rounds journaled by earlier (possibly crashed) sessions.
+        replay_journal(db)
+        # Start the writer now so the first log call of a session doesn't pay
+        # for spawning its thread.
+        _writer(db)
     except Exception:
         # Avoid raising in init to keep app usable; print traceback for developer.
         print("Failed to initialize log DB:")
-        traceback.print_exc()
+        _print_exc()
 
 
-def log(message: str, level: str = "INFO", path: Path = None):
-    """Insert a log row into the sqlite database. If DB write fails, fallback to printing."""
-    db = _db_path(path)
+def set_level(level: str):
+    """Set the minimum level written by `log`, `alog` and `SQLiteHandler`."""
+    global _min_level
+    if level.upper() not in LEVELS:
+        raise ValueError(f"unknown level {level!r}, expected one of {list(LEVELS)}")
+    _min_level = LEVELS[level.upper()]
+
+
+def is_enabled(level: str) -> bool:
+    """Return True if messages at `level` (any case) would be written."""
+    return LEVELS.get(level.upper(), _min_level) >= _min_level
+
+
+def _reject_positional_level(message: str, args: tuple):
+    # ``log("msg", "ERROR")`` makes the level a format argument; formatting
+    # would fail in the writer path and the row would only be printed.
+    last = args[-1] if args else None
+    if isinstance(last, str) and last.upper() in LEVELS:
+        try:
+            str(message) % args
+        except TypeError:
+            raise TypeError(f"log level {last!r} was passed as a format argument; use level={last!r}") from None
+
+
+def _log_entry(message: str, args: tuple, level: str):
+    message = str(message) % args if args else str(message)
+    return (
+        "INSERT INTO logs (level, message) VALUES (?, ?)",
+        (level, message),
+        lambda exc: print(f"[LOG {level}] {message}"),
+    )
+
+
+def log(message: str, *args, level: str = "INFO", path: Path = None):
+    """Queue a log row for the sqlite database. If DB write fails, fallback to printing.
+
+    Like the `logging` module, `args` are merged into `message` with `%`
+    only if `level` is enabled, so disabled calls cost neither formatting
+    nor I/O: ``log("User raw input: %s", raw, level="DEBUG")``. `level` is
+    case-insensitive and stored upper-case; a level passed positionally
+    (``log("msg", "ERROR")``) raises TypeError unless INFO is disabled.
+    """
+    level = level.upper()
+    if LEVELS.get(level, _min_level) < _min_level:
+        return
+    _reject_positional_level(message, args)
     try:
-        with _lock:
-            conn = sqlite3.connect(db)
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO logs (level, message) VALUES (?, ?)",
-                (level, str(message)),
-            )
-            conn.commit()
-            conn.close()
+        _writer(_db_path(path)).submit(*_log_entry(message, args, level))
+    except Exception:
+        print(f"[LOG {level}] {message} {args or ''}")
+        _print_exc()
+
+
+async def alog(message: str, *args, level: str = "INFO", path: Path = None):
+    """Async `log`: never blocks the event loop, even when the write queue is full."""
+    level = level.upper()
+    if LEVELS.get(level, _min_level) < _min_level:
+        return
+    _reject_positional_level(message, args)
+    try:
+        await _writer(_db_path(path)).asubmit(*_log_entry(message, args, level))
+    except Exception:
+        print(f"[LOG {level}] {message} {args or ''}")
+        _print_exc()
+
+
+def _handler_class():
+    import logging
+
+    class SQLiteHandler(logging.Handler):
+        """`logging.Handler` writing records to the `logs` table.
+
+        Records go through the same background writer and batching as `log`,
+        and are subject to `set_level` in addition to the handler's own level::
+
+            logging.getLogger().addHandler(logger_sqlite.SQLiteHandler())
+        """
+
+        def __init__(self, path: Path = None, level=logging.NOTSET):
+            super().__init__(level)
+            self.path = _db_path(path)
+
+        def emit(self, record: logging.LogRecord):
+            if LEVELS.get(record.levelname, _min_level) < _min_level:
+                return
+            try:
+                _writer(self.path).submit(*_log_entry(self.format(record), (), record.levelname))
+            except Exception:
+                self.handleError(record)
+
+    SQLiteHandler.__module__ = __name__
+    SQLiteHandler.__qualname__ = "SQLiteHandler"
+    return SQLiteHandler
+
+
+def __getattr__(name: str):
+    # `SQLiteHandler` is defined on first access, so programs that never use
+    # the `logging` module don't pay for importing it.
+    if name == "SQLiteHandler":
+        global SQLiteHandler
+        SQLiteHandler = _handler_class()
+        return SQLiteHandler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _utcnow() -> str:
+    """The current UTC time as SQLite's ``datetime('now')`` formats it."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+
+
+def _insert_round(conn: sqlite3.Connection, params: tuple):
+    timestamp, meta, data, columns, item_rows, staircase = params
+    # The save time, not the (possibly much later) commit or replay time.
+    cur = conn.execute(
+        "INSERT INTO rounds (timestamp, meta, data, difficulty, item_count, elapsed, correct, errors, participant) "
+        "VALUES (coalesce(?, datetime('now')), ?, ?, ?, ?, ?, ?, ?, ?)",
+        (timestamp, meta, data, *columns),
+    )
+    if isinstance(data, bytes):
+        import round_codec
+
+        # Committed with the record, so it can be decoded even after `WORDS` changes.
+        fp = round_codec.record_fingerprint(data)
+        stored = _stored_vocabularies.setdefault(conn, set())
+        if fp not in stored:
+            round_codec.save_vocabulary(conn, fp)
+            stored.add(fp)
+    _insert_items(conn, cur.lastrowid, item_rows)
+    _update_stats(conn, cur.lastrowid, columns, item_rows)
+    if staircase is not None:
+        # Latest `adaptive` state per participant; a replayed older round doesn't win.
+        conn.execute(
+            """
+            INSERT INTO staircase_state (participant, timestamp, state)
+            VALUES (?, coalesce(?, datetime('now')), ?)
+            ON CONFLICT (participant) DO UPDATE SET timestamp = excluded.timestamp, state = excluded.state
+            WHERE excluded.timestamp >= staircase_state.timestamp
+            """,
+            (columns[5] or "", timestamp, staircase),
+        )
+
+
+def _round_entry(metadata: dict, data: dict, timestamp: str, db: Path = None):
+    def dump(exc: BaseException = None):
+        # A round SQLite rejected would only fail again on replay, so just
+        # the ones that hit a busy database or an unavailable writer are
+        # journaled.
+        if db is not None and exc is not None and _is_transient(exc):
+            try:
+                _journal(db).append(metadata, data, timestamp)
+                print("Failed to save round to DB, kept it in the round journal")
+                return
+            except Exception:
+                _print_exc()
+        print("Failed to save round to DB, dumping to stdout")
+        print(metadata)
+        print(data)
+
+    import json
+
+    import round_codec
+
+    try:
+        columns, item_rows = _round_columns(metadata, data)
+        try:
+            # Compact binary record; payloads it can't reproduce exactly stay JSON.
+            payload = round_codec.dumps_data(data)
+        except (ValueError, TypeError, KeyError):
+            payload = json.dumps(data)
+        staircase = metadata.get("staircase")
+        if staircase is not None:
+            staircase = json.dumps(staircase)
+        return _insert_round, (timestamp, json.dumps(metadata), payload, columns, item_rows, staircase), dump
     except Exception:
-        print(f"[LOG {level}] {message}")
-        traceback.print_exc()
+        dump()
+        _print_exc()
+        return None
 
 
 def save_round(metadata: dict, data: dict, path: Path = None):
-    """Persist a round result as JSON in the `rounds` table.
+    """Queue a round result to be persisted in the `rounds` table.
 
-    `metadata` should contain small experiment-level fields (difficulty, times),
-    `data` is the detailed payload (items, answer, details).
+    `metadata` should contain small experiment-level fields (difficulty, time,
+    items, errors, optionally participant), `data` is the detailed payload
+    (items, answer, details, correct). Known fields go to typed columns and
+    `round_items`; `metadata` is also kept as JSON and `data` as a
+    `round_codec` binary record (or JSON when it has fields the codec doesn't
+    cover). Use `round_codec.loads_data` to read the `data` column back.
+
+    In journal mode (see `set_round_journal`) the round is appended to the
+    round journal instead and written to SQLite on the next replay.
     """
-    import json
+    db = _db_path(path)
+    timestamp = _utcnow()
+    if _journal_rounds and _append_journal(db, metadata, data, timestamp):
+        return
+    entry = _round_entry(metadata, data, timestamp, db)
+    if entry is None:
+        return
+    try:
+        _writer(db).submit(*entry)
+    except Exception as exc:
+        entry[2](exc)
+        _print_exc()
+
 
+async def asave_round(metadata: dict, data: dict, path: Path = None):
+    """Async `save_round`: never blocks the event loop."""
     db = _db_path(path)
+    timestamp = _utcnow()
+    if _journal_rounds and _append_journal(db, metadata, data, timestamp):
+        return
+    entry = _round_entry(metadata, data, timestamp, db)
+    if entry is None:
+        return
     try:
+        await _writer(db).asubmit(*entry)
+    except Exception as exc:
+        entry[2](exc)
+        _print_exc()
+
+
+def set_round_journal(on: bool = True):
+    """Journal rounds (one file append each) instead of queueing them for SQLite."""
+    global _journal_rounds
+    _journal_rounds = on
+
+
+def _journal(db: Path) -> "round_journal.Journal":
+    import round_journal
+
+    with _lock:
+        journal = _journals.get(db)
+        if journal is None:
+            journal = _journals[db] = round_journal.Journal(round_journal.directory_for(db))
+        return journal
+
+
+def _append_journal(db: Path, metadata: dict, data: dict, timestamp: str) -> bool:
+    try:
+        size = _journal(db).append(metadata, data, timestamp)
+    except Exception:
+        _print_exc()
+        return False
+    if size > JOURNAL_REPLAY_BYTES:
         with _lock:
-            conn = sqlite3.connect(db)
-            cur = conn.cursor()
-            cur.execute("INSERT INTO rounds (meta, data) VALUES (?, ?)",
-                        (json.dumps(metadata), json.dumps(data)))
-            conn.commit()
-            conn.close()
+            start = db not in _replaying
+            _replaying.add(db)
+        if start:
+            def run():
+                try:
+                    replay_journal(db)
+                finally:
+                    with _lock:
+                        _replaying.discard(db)
+            threading.Thread(target=run, name=f"journal-replay:{db.name}", daemon=True).start()
+    return True
+
+
+def _replay_file(conn: sqlite3.Connection, path: Path) -> int:
+    """Insert the rounds of one journal file not replayed yet; returns how many were inserted.
+
+    They go in one transaction. If SQLite rejects it, the records are retried
+    one by one and those it rejects again are moved aside with
+    `round_journal.reject`, so one bad round can't hold back the rest.
+    Transient errors (busy/locked) propagate and the file is retried later.
+    """
+    import round_journal
+
+    generation, records, skipped = round_journal.read(path)
+    if skipped:
+        print(f"Round journal {path.name}: skipped {skipped} torn/corrupt bytes")
+    row = conn.execute("SELECT generation, offset FROM journal_replays WHERE file = ?", (path.name,)).fetchone()
+    done = row[1] if row and row[0] == generation else 0
+    pending = [record for record in records if record[0] > done]
+    if not pending:
+        return 0
+
+    def progress(end: int):
+        # The progress marker commits together with the rounds, so a crash
+        # between commit and removal can't replay them twice.
+        return (
+            "INSERT INTO journal_replays (file, generation, offset) VALUES (?, ?, ?) "
+            "ON CONFLICT (file) DO UPDATE SET generation = excluded.generation, offset = excluded.offset",
+            (path.name, generation, end),
+            lambda exc: None,
+        )
+
+    entries = [_round_entry(metadata, data, timestamp) for _end, metadata, data, timestamp in pending]
+    if None not in entries:
+        try:
+            _transaction(conn, entries + [progress(pending[-1][0])])
+            return len(entries)
+        except sqlite3.Error as exc:
+            if _is_transient(exc):
+                raise
+            metrics.count("journal.failed_replays")
+    inserted = 0
+    for (end, metadata, data, timestamp), entry in zip(pending, entries):
+        if entry is None:
+            reason = "round could not be encoded"
+        else:
+            try:
+                _transaction(conn, [entry, progress(end)])
+                inserted += 1
+                continue
+            except sqlite3.Error as exc:
+                if _is_transient(exc):
+                    raise
+                reason = f"{type(exc).__name__}: {exc}"
+        metrics.count("journal.rejected")
+        round_journal.reject(path.parent, path.name, metadata, data, timestamp, reason)
+        print(f"Round journal {path.name}: moved a rejected round to {round_journal.REJECTED}")
+        _transaction(conn, [progress(end)])
+    return inserted
+
+
+def _replay_and_remove(conn: sqlite3.Connection, path: Path, fd: int) -> int:
+    """Replay a journal file locked by `fd`, then delete it; `fd` is closed either way."""
+    try:
+        count = _replay_file(conn, path)
+        if os.name != "nt":
+            path.unlink(missing_ok=True)
+    finally:
+        os.close(fd)
+    if os.name == "nt":
+        path.unlink(missing_ok=True)
+    # Only once the file is gone: its progress marker is what stops a re-replay.
+    conn.execute("DELETE FROM journal_replays WHERE file = ?", (path.name,))
+    return count
+
+
+def replay_journal(path: Path = None) -> int:
+    """Bulk-insert journaled rounds into `rounds`; returns how many were inserted.
+
+    Replays this process's journal and the journals left behind by processes
+    that are no longer running, deleting each file once it is replayed.
+    Files of other live processes are left to their owners.
+
+    This process's journal is first rotated to a new file, so `save_round`
+    only waits for that switch, never for the SQLite transaction. If the
+    replay fails the sealed file is unlocked and picked up as an orphan by
+    the next attempt.
+    """
+    db = _db_path(path)
+    with _lock:
+        own = _journals.get(db)
+    # `round_journal.directory_for`, checked before importing it: most
+    # sessions never journal anything.
+    if own is None and not Path(str(db) + ".journal").is_dir():
+        return 0
+    import round_journal
+
+    directory = round_journal.directory_for(db)
+    total = 0
+    conn = None
+    try:
+        conn = _connect(db)
+        conn.isolation_level = None
+        if own is not None:
+            with own.lock:
+                sealed = None if own.empty else own.rotate()
+            if sealed is not None:
+                total += _replay_and_remove(conn, *sealed)
+        for file, fd in round_journal.orphans(directory):
+            total += _replay_and_remove(conn, file, fd)
     except Exception:
-        print("Failed to save round to DB, dumping to stdout")
-        print(metadata)
-        print(data)
-        traceback.print_exc()
+        # Anything not replayed stays in the journal for the next attempt.
+        _print_exc()
+    finally:
+        if conn is not None:
+            _stored_vocabularies.pop(conn, None)
+            conn.close()
+    return total
+
+
+def flush(path: Path = None):
+    """Wait until every queued (or journaled) write for the database has been committed."""
+    db = _db_path(path)
+    with _lock:
+        writer = _writers.get(db)
+        journal = _journals.get(db)
+    if writer is not None:
+        writer.flush()
+    if journal is not None and not journal.empty:
+        replay_journal(db)
+
+
+async def aflush(path: Path = None):
+    """Async `flush`: waits for pending writes without blocking the event loop."""
+    import asyncio
+
+    await asyncio.get_running_loop().run_in_executor(None, flush, path)
+
+
+def enqueue_stats(path: Path = None) -> dict:
+    """Return how long `log`/`save_round` callers waited to hand entries over.
+
+    Keys: `calls`, `mean_s` and `max_s` (the worst-case delay a call added,
+    e.g. to stimulus timing). Entries only wait when the queue is full.
+    """
+    db = _db_path(path)
+    with _lock:
+        writer = _writers.get(db)
+    if writer is None or not writer.enqueued:
+        return {"calls": 0, "mean_s": 0.0, "max_s": 0.0}
+    return {
+        "calls": writer.enqueued,
+        "mean_s": writer.enqueue_total / writer.enqueued,
+        "max_s": writer.enqueue_max,
+    }
+
+
+def close():
+    """Commit pending writes and stop all writer threads.
+
+    Registered with `atexit`, so queued entries are written on a normal
+    interpreter exit. Logging again afterwards transparently restarts a writer.
+    """
+    with _lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.stop()
+    with _lock:
+        journals = list(_journals.items())
+    for db, journal in journals:
+        replay_journal(db)
+        with _lock:
+            _journals.pop(db, None)
+        # Whatever could not be replayed stays on disk for the next session.
+        journal.close(remove=journal.empty)
+    conns = getattr(_readers, "conns", None)
+    if conns:
+        for conn in conns.values():
+            conn.close()
+        conns.clear()
+
+
+atexit.register(close)
+
+
+def _after_fork_in_child():
+    # Writer threads and connections don't survive fork(); a forked worker
+    # starts its own writer on first use instead of feeding a dead queue.
+    global _lock, _readers
+    _lock = threading.Lock()
+    _writers.clear()
+    # The parent keeps appending to (and holds the lock of) its journal files.
+    for journal in _journals.values():
+        os.close(journal.fd)
+    _journals.clear()
+    _replaying.clear()
+    _readers = threading.local()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
 
 
 def fetch_last(n: int = 20, path: Path = None):
     """Return the last `n` log rows as tuples (id, timestamp, level, message)."""
     db = _db_path(path)
     try:
-        conn = sqlite3.connect(db)
-        cur = conn.cursor()
+        flush(db)
+        cur = _reader(db).cursor()
         cur.execute("SELECT id, timestamp, level, message FROM logs ORDER BY id DESC LIMIT ?", (n,))
-        rows = cur.fetchall()
+        return cur.fetchall()
+    except Exception:
+        _print_exc()
+        return []
+
+
+def enable_fts(path: Path = None) -> bool:
+    """Create the optional `logs_fts` full-text index over log messages.
+
+    Uses the FTS5 trigram tokenizer so `query_logs(contains=...)` keeps exact
+    (case-sensitive) substring semantics. Triggers keep it in sync with
+    `logs`. Returns False if this SQLite build has no FTS5 support.
+    """
+    db = _db_path(path)
+    flush(db)
+    conn = _connect(db)
+    try:
+        with conn:
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5("
+                "message, content='logs', content_rowid='id', tokenize='trigram case_sensitive 1')"
+            )
+            conn.executescript(
+                """
+                CREATE TRIGGER IF NOT EXISTS logs_fts_insert AFTER INSERT ON logs BEGIN
+                    INSERT INTO logs_fts (rowid, message) VALUES (new.id, new.message);
+                END;
+                CREATE TRIGGER IF NOT EXISTS logs_fts_delete AFTER DELETE ON logs BEGIN
+                    INSERT INTO logs_fts (logs_fts, rowid, message) VALUES ('delete', old.id, old.message);
+                END;
+                CREATE TRIGGER IF NOT EXISTS logs_fts_update AFTER UPDATE OF message ON logs BEGIN
+                    INSERT INTO logs_fts (logs_fts, rowid, message) VALUES ('delete', old.id, old.message);
+                    INSERT INTO logs_fts (rowid, message) VALUES (new.id, new.message);
+                END;
+                INSERT INTO logs_fts (logs_fts) VALUES ('rebuild');
+                """
+            )
+        return True
+    except sqlite3.OperationalError:
+        _print_exc()
+        return False
+    finally:
         conn.close()
-        return rows
+
+
+def query_logs(level=None, since=None, until=None, contains: str = None, before: tuple = None,
+               limit: int = None, page_size: int = 500, path: Path = None):
+    """Yield log rows (id, timestamp, level, message), newest first.
+
+    Filters (all optional and combined with AND):
+        level: a level name or a collection of them (any case)
+        since / until: inclusive bounds on `timestamp` ('YYYY-MM-DD HH:MM:SS'
+            strings or datetimes, UTC as written by SQLite)
+        contains: substring of the message; uses `logs_fts` when it exists
+            (see `enable_fts`) and the substring has at least 3 characters
+
+    Rows are fetched in pages of `page_size` using keyset pagination on
+    (timestamp, id), so each page is an index range scan no matter how deep
+    into the results it is. To resume later, pass the last row's
+    `(timestamp, id)` as `before`.
+    """
+    db = _db_path(path)
+    flush(db)
+    conn = _reader(db)
+
+    where, params = [], []
+    if level is not None:
+        levels = [name.upper() for name in ([level] if isinstance(level, str) else level)]
+        where.append(f"level IN ({', '.join('?' * len(levels))})")
+        params.extend(levels)
+    if since is not None:
+        where.append("timestamp >= ?")
+        params.append(str(since)[:19].replace("T", " "))
+    if until is not None:
+        where.append("timestamp <= ?")
+        params.append(str(until)[:19].replace("T", " "))
+    if contains:
+        has_fts = len(contains) >= 3 and conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'logs_fts'").fetchone()
+        if has_fts:
+            where.append("id IN (SELECT rowid FROM logs_fts WHERE logs_fts MATCH ?)")
+            params.append('"' + contains.replace('"', '""') + '"')
+        else:
+            where.append("instr(message, ?) > 0")
+            params.append(contains)
+
+    remaining = limit
+    while remaining is None or remaining > 0:
+        clauses = list(where)
+        page_params = list(params)
+        if before is not None:
+            clauses.append("(timestamp, id) < (?, ?)")
+            page_params.extend(before)
+        size = page_size if remaining is None else min(page_size, remaining)
+        sql = "SELECT id, timestamp, level, message FROM logs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        rows = conn.execute(sql, (*page_params, size)).fetchall()
+        yield from rows
+        if len(rows) < size:
+            return
+        before = (rows[-1][1], rows[-1][0])
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def accuracy_by_difficulty(days: float = 7, path: Path = None):
+    """Return per-difficulty stats for rounds of the last `days` days.
+
+    Rows are tuples (difficulty, rounds, accuracy, mean_errors, mean_time).
+    """
+    db = _db_path(path)
+    try:
+        flush(db)
+        cur = _reader(db).cursor()
+        cur.execute(
+            """
+            SELECT difficulty, COUNT(*), AVG(correct), AVG(errors), AVG(elapsed)
+            FROM rounds
+            WHERE timestamp >= datetime('now', ?)
+            GROUP BY difficulty
+            ORDER BY difficulty
+            """,
+            (f"-{days} days",),
+        )
+        return cur.fetchall()
     except Exception:
-        traceback.print_exc()
+        _print_exc()
         return []
 
 
-__all__ = ["init_db", "log", "fetch_last"]
+__all__ = ["init_db", "log", "alog", "set_level", "is_enabled", "SQLiteHandler", "save_round", "asave_round",
+           "set_round_journal", "replay_journal", "flush", "aflush", "close",
+           "enqueue_stats", "fetch_last", "query_logs", "enable_fts", "accuracy_by_difficulty"]
@@ -0,0 +1,266 @@
+"""Lightweight in-process instrumentation: timing spans, counters and profiling.
+
+Disabled unless ``STM_METRICS=1`` is set (or `enable()` is called). While
+disabled, `span` returns a shared no-op context manager and `count` returns
+right away, so instrumented call sites cost one global lookup and a branch.
+
+Spans record their duration into a histogram per name (fixed log-spaced
+buckets, plus count/sum/min/max); counters are plain totals. `snapshot`
+returns everything as a JSON-friendly dict, `prometheus` as Prometheus text
+exposition format (``stm_span_seconds`` histograms, ``stm_events_total``
+counters).
+
+Profiling is opt-in through ``STM_PROFILE``:
+
+- ``cprofile``: `profiled` runs the wrapped call under `cProfile` and writes
+  the stats to ``STM_PROFILE_OUT`` (default ``stm_profile.pstats``);
+- ``sample``: a background thread samples the main thread's stack every
+  ``STM_PROFILE_INTERVAL`` seconds (default 0.005) and writes collapsed
+  stacks (flame graph input) to ``STM_PROFILE_OUT`` (default
+  ``stm_profile.folded``).
+
+Example:
+    with metrics.span("generate_sequence"):
+        items, key = generate_sequence(...)
+    metrics.count("rounds")
+"""
+
+from bisect import bisect_left
+from collections import Counter
+import functools
+import os
+from pathlib import Path
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Upper bounds (seconds) of the histogram buckets; one more bucket is +Inf.
+BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+_enabled = os.environ.get("STM_METRICS", "").lower() in ("1", "true", "yes", "on")
+_lock = threading.Lock()
+_histograms: Dict[str, "_Histogram"] = {}
+_counters: Dict[str, float] = {}
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "sum", "min", "max")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.buckets[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.start)
+        if exc_type is not None:
+            count(self.name + ".errors")
+        return False
+
+
+def enable(on: bool = True):
+    """Turn recording on or off at runtime (the default comes from STM_METRICS)."""
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def span(name: str):
+    """Context manager timing its body into the `name` histogram; exceptions also count ``name.errors``."""
+    if not _enabled:
+        return _NOOP
+    return _Span(name)
+
+
+def timed(name: str = None):
+    """Decorator form of `span`; the name defaults to the function's qualified name."""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def observe(name: str, seconds: float):
+    """Record one duration into the `name` histogram."""
+    if not _enabled:
+        return
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = _Histogram()
+        hist.add(seconds)
+
+
+def count(name: str, n: float = 1):
+    """Add `n` to the `name` counter."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def snapshot() -> Dict[str, Any]:
+    """All spans and counters as a JSON-friendly dict."""
+    with _lock:
+        spans = {
+            name: {
+                "count": h.count,
+                "sum": h.sum,
+                "mean": h.sum / h.count if h.count else 0.0,
+                "min": h.min if h.count else 0.0,
+                "max": h.max,
+                "buckets": dict(zip([*map(str, BUCKETS), "+Inf"], h.buckets)),
+            }
+            for name, h in sorted(_histograms.items())
+        }
+        counters = dict(sorted(_counters.items()))
+    return {"spans": spans, "counters": counters}
+
+
+def _label(name: str) -> str:
+    return name.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus() -> str:
+    """All spans and counters in the Prometheus text exposition format."""
+    with _lock:
+        histograms = sorted((name, list(h.buckets), h.count, h.sum) for name, h in _histograms.items())
+        counters = sorted(_counters.items())
+    lines = ["# HELP stm_span_seconds Duration of instrumented spans.", "# TYPE stm_span_seconds histogram"]
+    for name, buckets, n, total in histograms:
+        label = _label(name)
+        cumulative = 0
+        for bound, c in zip([*map(repr, BUCKETS), "+Inf"], buckets):
+            cumulative += c
+            lines.append(f'stm_span_seconds_bucket{{name="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'stm_span_seconds_sum{{name="{label}"}} {total!r}')
+        lines.append(f'stm_span_seconds_count{{name="{label}"}} {n}')
+    lines += ["# HELP stm_events_total Instrumented event counters.", "# TYPE stm_events_total counter"]
+    lines += [f'stm_events_total{{name="{_label(name)}"}} {value}' for name, value in counters]
+    return "\n".join(lines) + "\n"
+
+
+def dump_json(path: Path):
+    import json
+
+    Path(path).write_text(json.dumps(snapshot(), indent=2), encoding="utf-8")
+
+
+# ---- profiling ----
+
+class _Sampler:
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stm-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def write(self, path: Path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+def profiled(fn: Callable, *args, mode: Optional[str] = None, out: Optional[str] = None, **kwargs):
+    """Call ``fn(*args, **kwargs)``, profiled according to STM_PROFILE (or `mode`).
+
+    Without a mode this is a plain call. The profile is written even if `fn`
+    raises (e.g. KeyboardInterrupt).
+    """
+    mode = (mode or os.environ.get("STM_PROFILE", "")).lower()
+    out = out or os.environ.get("STM_PROFILE_OUT")
+    if mode == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(fn, *args, **kwargs)
+        finally:
+            profiler.dump_stats(out or "stm_profile.pstats")
+    if mode == "sample":
+        sampler = _Sampler(threading.get_ident(), float(os.environ.get("STM_PROFILE_INTERVAL", 0.005)))
+        try:
+            with sampler:
+                return fn(*args, **kwargs)
+        finally:
+            sampler.write(out or "stm_profile.folded")
+    if mode:
+        raise ValueError(f"unknown STM_PROFILE mode {mode!r}, expected 'cprofile' or 'sample'")
+    return fn(*args, **kwargs)
+
+
+__all__ = ["span", "timed", "observe", "count", "enable", "enabled", "reset", "snapshot", "prometheus",
+           "dump_json", "profiled", "BUCKETS"]
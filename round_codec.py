@@ -0,0 +1,367 @@
+"""Compact in-memory and binary representation of round results.
+
+A round as produced by the game is a dict (or `RoundResult`) of Python lists
+mixing ints and strings plus a list of ``(user, key, ok)`` tuples, which is
+large in memory and larger still as JSON. `CompactRound` keeps the same
+information as:
+
+- item and answer *codes* in an `array`: digits are their own value (0-9),
+  vocabulary words are ``WORD_CODE_BASE + index`` (the encoding `game_batch`
+  uses) and anything else is a negative reference into a small ``extras``
+  tuple. Codes are one byte each while the vocabulary has fewer than 118
+  words, two bytes otherwise;
+- the per-position ``ok`` flags as an int bitmask (bit ``i`` = position ``i``).
+
+The details list, error count and correctness are derived from these on
+demand, exactly as `check_answer` would report them.
+
+`encode`/`decode` turn a `CompactRound` into a versioned, struct-packed
+binary record (see `FORMAT_VERSION`). Records carry a fingerprint of the
+vocabulary they were encoded with, so a record is never decoded against a
+different word list by accident. Databases keep every vocabulary their
+records use in the ``vocabularies`` table (`save_vocabulary`), so records
+stay readable after `WORDS` changes: call `load_vocabularies` before
+decoding rows of a database.
+"""
+
+from array import array
+import json
+import sqlite3
+import struct
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from game_core import WORDS, RoundResult, Vocabulary
+
+WORD_CODE_BASE = 10
+# Shown by `check_answer` for key positions without (or with a None) answer.
+MISSING = "----"
+
+MAGIC = b"SR"
+FORMAT_VERSION = 1
+# magic, version, flags, vocabulary fingerprint, #items, #answer, #extras
+_HEADER = struct.Struct("<2sBBIHHH")
+_FLAG_WIDE = 0x01
+_FLAG_CORRECT = 0x02
+_MAX_ITEMS = 0xFFFF
+
+_DEFAULT_VOCABULARY = Vocabulary(WORDS)
+# Vocabularies known to `decode`, by fingerprint.
+_vocabularies: Dict[int, Vocabulary] = {}
+
+
+def fingerprint(vocabulary: Vocabulary) -> int:
+    """CRC-32 of the vocabulary's words, in order."""
+    return zlib.crc32("\n".join(vocabulary.words).encode("utf-8"))
+
+
+def register_vocabulary(vocabulary: Vocabulary) -> int:
+    """Make `vocabulary` available to `decode`; returns its fingerprint."""
+    fp = fingerprint(vocabulary)
+    _vocabularies[fp] = vocabulary
+    return fp
+
+
+register_vocabulary(_DEFAULT_VOCABULARY)
+
+
+def record_fingerprint(blob: bytes) -> int:
+    """The fingerprint of the vocabulary a record produced by `encode` was encoded with."""
+    try:
+        return _HEADER.unpack_from(blob)[3]
+    except struct.error:
+        raise ValueError("corrupt round record: truncated header") from None
+
+
+def save_vocabulary(conn, fp: int = None):
+    """Store registered vocabulary `fp` (default: every registered one) in `conn`'s ``vocabularies`` table.
+
+    Vocabularies already stored are left alone.
+    """
+    conn.executemany("INSERT OR IGNORE INTO vocabularies (fingerprint, words) VALUES (?, ?)",
+                     [(key, json.dumps(_vocabularies[key].words)) for key in ([fp] if fp is not None else _vocabularies)])
+
+
+def load_vocabularies(conn) -> int:
+    """Register the vocabularies stored in `conn`'s ``vocabularies`` table; returns how many were new."""
+    try:
+        rows = conn.execute("SELECT fingerprint, words FROM vocabularies").fetchall()
+    except sqlite3.OperationalError:
+        return 0  # a database from before the table existed
+    new = 0
+    for fp, words in rows:
+        if fp not in _vocabularies:
+            vocabulary = Vocabulary(json.loads(words))
+            if fingerprint(vocabulary) != fp:
+                raise ValueError(f"stored vocabulary {fp:#010x} does not match its fingerprint")
+            _vocabularies[fp] = vocabulary
+            new += 1
+    return new
+
+
+def _codes(values: Sequence[Any], vocabulary: Vocabulary, extras: List[Any]) -> List[int]:
+    out = []
+    index = vocabulary._index
+    for value in values:
+        kind = type(value)
+        if kind is int and 0 <= value < WORD_CODE_BASE:
+            out.append(value)
+        elif kind is str and value in index:
+            out.append(WORD_CODE_BASE + index[value])
+        else:
+            # Exact-type checks above keep True/1 and 1.0/1 apart, as JSON does.
+            try:
+                j = next(j for j, e in enumerate(extras) if type(e) is kind and e == value)
+            except StopIteration:
+                j = len(extras)
+                extras.append(value)
+            out.append(-1 - j)
+    return out
+
+
+def _array(codes: List[int]) -> array:
+    narrow = all(-128 <= c < 128 for c in codes)
+    return array("b" if narrow else "h", codes)
+
+
+class CompactRound:
+    """One round's items, answer and per-position correctness, compactly.
+
+    Build one with `from_data` / `from_result`; convert back with `to_data` /
+    `to_result`.
+    """
+
+    __slots__ = ("vocabulary", "items_codes", "answer_codes", "extras", "ok_mask", "metadata")
+
+    def __init__(self, vocabulary: Vocabulary, items_codes: array, answer_codes: array,
+                 extras: Tuple[Any, ...], ok_mask: int, metadata: Optional[Dict[str, Any]] = None):
+        self.vocabulary = vocabulary
+        self.items_codes = items_codes
+        self.answer_codes = answer_codes
+        self.extras = extras
+        self.ok_mask = ok_mask
+        self.metadata = metadata
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any], vocabulary: Vocabulary = None,
+                  metadata: Optional[Dict[str, Any]] = None) -> "CompactRound":
+        """Build from a `save_round` payload ({items, answer, details, correct}).
+
+        Raises ValueError if the payload has other keys or if its details or
+        correctness disagree with what `check_answer` derives from the items
+        and answer, since those could not be reproduced.
+        """
+        vocabulary = vocabulary or _DEFAULT_VOCABULARY
+        unknown = set(data) - {"items", "answer", "details", "correct"}
+        if unknown:
+            raise ValueError(f"cannot encode payload fields {sorted(unknown)}")
+        items, answer = list(data["items"]), list(data["answer"])
+        if max(len(items), len(answer)) > _MAX_ITEMS:
+            raise ValueError("round has too many items to encode")
+        extras: List[Any] = []
+        item_codes = _codes(items, vocabulary, extras)
+        answer_codes = _codes(answer, vocabulary, extras)
+        ok_mask = 0
+        expected = []
+        for i, key in enumerate(items):
+            user = answer[i] if i < len(answer) else None
+            ok = user == key
+            if ok:
+                ok_mask |= 1 << i
+            expected.append((MISSING if user is None else user, key, ok))
+        details = data.get("details")
+        if details is not None and (len(details) != len(expected)
+                                    or any(tuple(d) != e for d, e in zip(details, expected))):
+            raise ValueError("round details do not match its items and answer")
+        compact = cls(vocabulary, _array(item_codes), _array(answer_codes), tuple(extras), ok_mask, metadata)
+        if "correct" in data and bool(data["correct"]) != compact.correct:
+            raise ValueError("round correctness does not match its items and answer")
+        return compact
+
+    @classmethod
+    def from_result(cls, result: RoundResult, vocabulary: Vocabulary = None) -> "CompactRound":
+        return cls.from_data({"items": result.items, "answer": result.answer, "details": result.details,
+                              "correct": result.correct}, vocabulary, result.metadata)
+
+    def _decode(self, codes: array) -> List[Any]:
+        words, extras = self.vocabulary.words, self.extras
+        return [c if 0 <= c < WORD_CODE_BASE else words[c - WORD_CODE_BASE] if c > 0 else extras[-1 - c]
+                for c in codes]
+
+    @property
+    def items(self) -> List[Any]:
+        return self._decode(self.items_codes)
+
+    @property
+    def answer(self) -> List[Any]:
+        return self._decode(self.answer_codes)
+
+    @property
+    def details(self) -> List[Tuple[Any, Any, bool]]:
+        """Per-position ``(user_value, key_value, is_correct)``, as `check_answer` returns them."""
+        answer = self.answer
+        answer += [None] * (len(self.items_codes) - len(answer))
+        return [(MISSING if user is None else user, key, bool(self.ok_mask >> i & 1))
+                for i, (user, key) in enumerate(zip(answer, self.items))]
+
+    @property
+    def errors(self) -> int:
+        return len(self.items_codes) - bin(self.ok_mask).count("1")
+
+    @property
+    def correct(self) -> bool:
+        return self.errors == 0 and len(self.answer_codes) == len(self.items_codes)
+
+    def to_data(self) -> Dict[str, Any]:
+        """The `save_round` payload this round was built from."""
+        return {"items": self.items, "answer": self.answer, "details": self.details, "correct": self.correct}
+
+    def to_result(self) -> RoundResult:
+        return RoundResult(self.items, self.answer, self.correct, self.errors, self.details,
+                           dict(self.metadata or {}))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactRound):
+            return NotImplemented
+        return self.to_data() == other.to_data() and self.metadata == other.metadata
+
+    def __repr__(self) -> str:
+        return f"CompactRound(items={self.items!r}, answer={self.answer!r}, errors={self.errors})"
+
+
+def _pack_extra(value: Any) -> bytes:
+    kind = type(value)
+    if value is None:
+        return b"n"
+    if kind is bool:
+        return b"b" + bytes([value])
+    if kind is int:
+        return b"i" + struct.pack("<q", value)
+    if kind is float:
+        return b"f" + struct.pack("<d", value)
+    if kind is str:
+        raw = value.encode("utf-8")
+        return b"s" + struct.pack("<I", len(raw)) + raw
+    raise TypeError(f"cannot encode item of type {kind.__name__}")
+
+
+def _unpack_extra(buf: memoryview, pos: int) -> Tuple[Any, int]:
+    tag = bytes(buf[pos:pos + 1])
+    pos += 1
+    if tag == b"n":
+        return None, pos
+    if tag == b"b":
+        return bool(buf[pos]), pos + 1
+    if tag == b"i":
+        return struct.unpack_from("<q", buf, pos)[0], pos + 8
+    if tag == b"f":
+        return struct.unpack_from("<d", buf, pos)[0], pos + 8
+    if tag == b"s":
+        (size,) = struct.unpack_from("<I", buf, pos)
+        pos += 4
+        return str(buf[pos:pos + size], "utf-8"), pos + size
+    raise ValueError(f"corrupt round record: unknown value tag {tag!r}")
+
+
+def _code_bytes(codes: array, wide: bool) -> bytes:
+    codes = array("h" if wide else "b", codes)
+    if wide and array("h", [1]).tobytes()[0] == 0:
+        codes.byteswap()  # stored little-endian
+    return codes.tobytes()
+
+
+def encode(compact: CompactRound) -> bytes:
+    """Serialize `compact` (including its metadata, as JSON) to bytes."""
+    wide = compact.items_codes.typecode == "h" or compact.answer_codes.typecode == "h"
+    n_items, n_answer = len(compact.items_codes), len(compact.answer_codes)
+    flags = (_FLAG_WIDE if wide else 0) | (_FLAG_CORRECT if compact.correct else 0)
+    meta = json.dumps(compact.metadata).encode("utf-8") if compact.metadata is not None else b""
+    return b"".join([
+        _HEADER.pack(MAGIC, FORMAT_VERSION, flags, fingerprint(compact.vocabulary),
+                     n_items, n_answer, len(compact.extras)),
+        _code_bytes(compact.items_codes, wide),
+        _code_bytes(compact.answer_codes, wide),
+        compact.ok_mask.to_bytes((n_items + 7) // 8, "little"),
+        *(_pack_extra(e) for e in compact.extras),
+        struct.pack("<I", len(meta)),
+        meta,
+    ])
+
+
+def decode(blob: bytes, vocabulary: Vocabulary = None) -> CompactRound:
+    """Parse a record produced by `encode`.
+
+    The vocabulary is looked up by the record's fingerprint among the
+    registered ones unless given; ValueError is raised for unknown versions,
+    unknown or mismatching vocabularies and corrupt records.
+    """
+    buf = memoryview(blob)
+    try:
+        magic, version, flags, fp, n_items, n_answer, n_extras = _HEADER.unpack_from(buf)
+    except struct.error:
+        raise ValueError("corrupt round record: truncated header") from None
+    if magic != MAGIC:
+        raise ValueError("not a round record")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"unsupported round record version {version}")
+    if vocabulary is None:
+        vocabulary = _vocabularies.get(fp)
+        if vocabulary is None:
+            raise ValueError(f"round record uses an unregistered vocabulary ({fp:#010x}); "
+                             "see load_vocabularies")
+    elif fingerprint(vocabulary) != fp:
+        raise ValueError("round record was encoded with a different vocabulary")
+
+    try:
+        pos = _HEADER.size
+        width = 2 if flags & _FLAG_WIDE else 1
+        codes = []
+        for n in (n_items, n_answer):
+            chunk = array("h" if width == 2 else "b", bytes(buf[pos:pos + n * width]))
+            if width == 2 and array("h", [1]).tobytes()[0] == 0:
+                chunk.byteswap()
+            if len(chunk) != n:
+                raise ValueError("corrupt round record: truncated codes")
+            codes.append(chunk)
+            pos += n * width
+        mask_size = (n_items + 7) // 8
+        ok_mask = int.from_bytes(buf[pos:pos + mask_size], "little")
+        pos += mask_size
+        extras = []
+        for _ in range(n_extras):
+            value, pos = _unpack_extra(buf, pos)
+            extras.append(value)
+        (meta_size,) = struct.unpack_from("<I", buf, pos)
+        pos += 4
+        metadata = json.loads(str(buf[pos:pos + meta_size], "utf-8")) if meta_size else None
+    except (struct.error, IndexError, UnicodeDecodeError):
+        raise ValueError("corrupt round record") from None
+
+    compact = CompactRound(vocabulary, *codes, tuple(extras), ok_mask, metadata)
+    if any(c >= WORD_CODE_BASE + len(vocabulary) or c < -n_extras for c in compact.items_codes + compact.answer_codes):
+        raise ValueError("corrupt round record: code out of range")
+    if bool(flags & _FLAG_CORRECT) != compact.correct:
+        raise ValueError("corrupt round record: inconsistent correctness flag")
+    return compact
+
+
+def dumps_data(data: Dict[str, Any], vocabulary: Vocabulary = None) -> bytes:
+    """Encode a `save_round` payload; raises ValueError/TypeError if it can't be reproduced exactly."""
+    return encode(CompactRound.from_data(data, vocabulary))
+
+
+def loads_data(value) -> Optional[Dict[str, Any]]:
+    """Decode a stored `rounds.data` value, binary record or legacy JSON text.
+
+    Records of vocabularies other than the current one need `load_vocabularies` first.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return decode(value).to_data()
+    return json.loads(value)
+
+
+__all__ = ["CompactRound", "encode", "decode", "dumps_data", "loads_data", "fingerprint",
+           "register_vocabulary", "record_fingerprint", "save_vocabulary", "load_vocabularies",
+           "FORMAT_VERSION", "WORD_CODE_BASE"]
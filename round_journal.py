@@ -0,0 +1,224 @@
+"""Append-only, checksummed journal files for rounds.
+
+Each process appends to its own journal file inside a directory next to the
+database (``log.db`` -> ``log.db.journal/<pid>-<random>.journal``). A file
+is a header (magic + generation number) followed by records:
+
+    b"RR" | payload length (uint32) | CRC-32 of payload (uint32) | payload
+
+where the payload is the JSON ``[metadata, data, timestamp]`` of one
+`save_round` call (``timestamp`` is the UTC save time as SQLite's
+``datetime('now')`` writes it; files from before it was added have only
+two elements). Appending is a single `os.write` on an ``O_APPEND`` descriptor, with
+no SQLite involved.
+
+Readers map the file with `mmap`. A record that is incomplete or fails its
+checksum (a torn write from a crash, or corruption) is skipped: the reader
+scans forward for the next record marker and carries on from there, so
+intact records after a bad one are still read. The skipped bytes are
+counted and reported.
+
+Writers never reuse a file (`Journal.rotate` starts a new one), so the
+generation in the header is always 1 now. It is kept, together with the
+``journal_replays.generation`` column, because earlier versions emptied a
+file in place and bumped its generation: replay progress recorded for an
+older generation of such a leftover file must not be applied to its
+current contents.
+
+The owning process holds an exclusive lock on its file for as long as it is
+open, so `orphans` can tell journals of crashed processes from those still in
+use. Replaying journals into SQLite is done by `logger_sqlite`; records it
+cannot insert are moved to ``rejected.jsonl`` in the same directory.
+"""
+
+import json
+import mmap
+import os
+from pathlib import Path
+import struct
+import threading
+import zlib
+from typing import Any, Iterator, List, Optional, Tuple
+
+FILE_MAGIC = b"SRJ1"
+_FILE_HEADER = struct.Struct("<4sQ")  # magic, generation
+HEADER_SIZE = _FILE_HEADER.size
+RECORD_MAGIC = b"RR"
+_RECORD_HEADER = struct.Struct("<2sII")  # magic, payload length, crc32
+# Refuse absurd lengths from corrupt headers instead of trusting them.
+MAX_RECORD_BYTES = 16 * 1024 * 1024
+SUFFIX = ".journal"
+# Rounds SQLite refused during replay, one JSON object per line.
+REJECTED = "rejected.jsonl"
+
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+
+def directory_for(db: Path) -> Path:
+    return Path(str(db) + ".journal")
+
+
+def encode(metadata: dict, data: dict, timestamp: str = None) -> bytes:
+    """One framed record for a `save_round` payload."""
+    payload = json.dumps([metadata, data, timestamp], separators=(",", ":")).encode("utf-8")
+    return _RECORD_HEADER.pack(RECORD_MAGIC, len(payload), zlib.crc32(payload)) + payload
+
+
+def _write_all(fd: int, data: bytes):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+class Journal:
+    """This process's journal file for one database. Thread-safe."""
+
+    def __init__(self, directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self.lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        self.path = self.directory / f"{os.getpid()}-{os.urandom(4).hex()}{SUFFIX}"
+        flags = os.O_RDWR | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0)
+        self.fd = os.open(self.path, flags, 0o644)
+        _try_lock(self.fd)
+        self.generation = 1
+        header = _FILE_HEADER.pack(FILE_MAGIC, self.generation)
+        _write_all(self.fd, header)
+        self.size = len(header)
+
+    def append(self, metadata: dict, data: dict, timestamp: str = None, sync: bool = False) -> int:
+        """Append one round; returns the journal size afterwards.
+
+        With `sync` the record is also fsync'ed (survives power loss, not just
+        a process crash).
+        """
+        record = encode(metadata, data, timestamp)
+        with self.lock:
+            _write_all(self.fd, record)
+            if sync:
+                os.fsync(self.fd)
+            self.size += len(record)
+            return self.size
+
+    def rotate(self) -> Tuple[Path, int]:
+        """Continue in a new file; call with `lock` held.
+
+        Returns the sealed file's path and its descriptor, which still holds
+        the file lock so no other process replays it. The caller replays it
+        without holding `lock`, then removes it and closes the descriptor.
+        """
+        sealed = self.path, self.fd
+        self._open()
+        return sealed
+
+    @property
+    def empty(self) -> bool:
+        """True while the file holds no records, only its header."""
+        return self.size <= HEADER_SIZE
+
+    def close(self, remove: bool = True):
+        with self.lock:
+            # Unlink while still holding the file lock where the OS allows it,
+            # so no other process can pick the file up in between.
+            if remove and os.name != "nt":
+                self.path.unlink(missing_ok=True)
+            os.close(self.fd)
+            if remove and os.name == "nt":
+                self.path.unlink(missing_ok=True)
+
+
+def read(path: Path) -> Tuple[int, List[Tuple[int, Any, Any, Optional[str]]], int]:
+    """Read a journal file with `mmap`.
+
+    Returns ``(generation, records, skipped)``: ``records`` are
+    ``(end_offset, metadata, data, timestamp)`` for every intact record,
+    ``skipped`` the number of bytes that were torn or corrupt.
+    A file without a valid header reads as generation 0 with no records.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < _FILE_HEADER.size:
+            return 0, [], size
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            magic, generation = _FILE_HEADER.unpack_from(view)
+            if magic != FILE_MAGIC:
+                return 0, [], size
+            return (generation, *_scan(view, size, _FILE_HEADER.size))
+
+
+def _scan(view, size: int, pos: int):
+    records = []
+    skipped = 0
+    while pos < size:
+        ok = False
+        if size - pos >= _RECORD_HEADER.size:
+            magic, length, crc = _RECORD_HEADER.unpack_from(view, pos)
+            end = pos + _RECORD_HEADER.size + length
+            if magic == RECORD_MAGIC and length <= MAX_RECORD_BYTES and end <= size:
+                payload = view[pos + _RECORD_HEADER.size:end]
+                if zlib.crc32(payload) == crc:
+                    try:
+                        metadata, data, *rest = json.loads(payload)
+                        records.append((end, metadata, data, rest[0] if rest else None))
+                        ok = True
+                    except (ValueError, TypeError):
+                        pass
+        if ok:
+            pos = end
+            continue
+        # Torn or corrupt: resynchronise on the next record marker, if any.
+        following = view.find(RECORD_MAGIC, pos + 1)
+        following = size if following < 0 else following
+        skipped += following - pos
+        pos = following
+    return records, skipped
+
+
+def reject(directory: Path, source: str, metadata: Any, data: Any, timestamp: str, reason: str):
+    """Append a record that could not be replayed to `REJECTED` in `directory`, for inspection."""
+    line = json.dumps({"source": source, "reason": reason, "timestamp": timestamp, "metadata": metadata,
+                       "data": data}, default=repr)
+    with open(directory / REJECTED, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def orphans(directory: Path) -> Iterator[Tuple[Path, int]]:
+    """Yield ``(path, fd)`` for journals whose owner is gone, locked for the caller.
+
+    The caller must close `fd` (and remove the file once it is replayed).
+    """
+    if not directory.is_dir():
+        return
+    for path in sorted(directory.glob("*" + SUFFIX)):
+        try:
+            fd = os.open(path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+        except OSError:
+            continue
+        if _try_lock(fd):
+            yield path, fd
+        else:
+            os.close(fd)
+
+
+__all__ = ["Journal", "read", "reject", "orphans", "encode", "directory_for", "HEADER_SIZE", "REJECTED"]
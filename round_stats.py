@@ -0,0 +1,155 @@
+"""Dashboard queries over the materialized round aggregates.
+
+`logger_sqlite` keeps two aggregate tables up to date in the same
+transaction that stores each round:
+
+- ``round_stats``: per participant, difficulty and (UTC) day, the number of
+  rounds, correct rounds and items, plus sums and sums of squares of errors
+  and answer time;
+- ``position_stats``: per participant and difficulty, how often each serial
+  position was presented and answered wrong.
+
+The functions here read only those tables, so their cost depends on the
+number of groups, not on the number of stored rounds. Rounds without a
+participant are grouped under ``""``. `rebuild` recomputes both tables from
+the raw rows (e.g. after deleting or editing rounds by hand).
+
+Usage:
+    python round_stats.py                 # per participant/difficulty summary
+    python round_stats.py --positions     # serial-position error curve
+    python round_stats.py --rebuild
+"""
+
+import argparse
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import logger_sqlite
+import schema
+
+
+def _sd(n: int, total: float, total_sq: float) -> Optional[float]:
+    """Sample standard deviation from a count, sum and sum of squares."""
+    if n < 2:
+        return None
+    return math.sqrt(max(0.0, (total_sq - total * total / n) / (n - 1)))
+
+
+def _filters(participant: Optional[str], difficulty: Optional[str], since: Optional[str] = None):
+    clauses, params = [], []
+    if participant is not None:
+        clauses.append("participant = ?")
+        params.append(participant)
+    if difficulty is not None:
+        clauses.append("difficulty = ?")
+        params.append(str(difficulty))
+    if since is not None:
+        clauses.append("day >= ?")
+        params.append(since)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _query(sql: str, params, path: Path):
+    db = logger_sqlite._db_path(path)
+    logger_sqlite.flush(db)
+    return logger_sqlite._reader(db).execute(sql, params).fetchall()
+
+
+def summary(participant: str = None, difficulty: str = None, since: str = None,
+            by_day: bool = False, path: Path = None) -> List[Dict[str, object]]:
+    """Per participant and difficulty (and day, with `by_day`) statistics.
+
+    `since` is an inclusive ``YYYY-MM-DD`` day. Each dict has participant,
+    difficulty, [day,] rounds, accuracy, mean_items, mean_errors, sd_errors,
+    mean_time and sd_time (None where undefined).
+    """
+    where, params = _filters(participant, difficulty, since)
+    keys = "participant, difficulty, day" if by_day else "participant, difficulty"
+    rows = _query(
+        f"""
+        SELECT {keys}, SUM(rounds), SUM(correct), SUM(items), SUM(errors), SUM(errors_sq),
+               SUM(timed), SUM(elapsed), SUM(elapsed_sq)
+        FROM round_stats{where}
+        GROUP BY {keys}
+        ORDER BY {keys}
+        """,
+        params, path,
+    )
+    names = keys.split(", ")
+    out = []
+    for row in rows:
+        n, correct, items, errors, errors_sq, timed, elapsed, elapsed_sq = row[len(names):]
+        stats = dict(zip(names, row))
+        stats.update(
+            rounds=n,
+            accuracy=correct / n,
+            mean_items=items / n,
+            mean_errors=errors / n,
+            sd_errors=_sd(n, errors, errors_sq),
+            mean_time=elapsed / timed if timed else None,
+            sd_time=_sd(timed, elapsed, elapsed_sq),
+        )
+        out.append(stats)
+    return out
+
+
+def position_curve(participant: str = None, difficulty: str = None,
+                   path: Path = None) -> List[Tuple[int, int, float]]:
+    """Serial-position error curve as (position, trials, error_rate), position 0-based."""
+    where, params = _filters(participant, difficulty)
+    rows = _query(
+        f"SELECT position, SUM(trials), SUM(errors) FROM position_stats{where} GROUP BY position ORDER BY position",
+        params, path,
+    )
+    return [(pos, trials, errors / trials) for pos, trials, errors in rows]
+
+
+def rebuild(path: Path = None) -> int:
+    """Recompute the aggregate tables from `rounds`/`round_items`; returns the number of rounds."""
+    db = logger_sqlite._db_path(path)
+    logger_sqlite.init_db(db)
+    logger_sqlite.flush(db)
+    conn = logger_sqlite._connect(db)
+    try:
+        conn.isolation_level = None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            schema.rebuild_stats(conn.cursor())
+            count = conn.execute("SELECT COALESCE(SUM(rounds), 0) FROM round_stats").fetchone()[0]
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show or rebuild the per-participant round aggregates.")
+    parser.add_argument("--db", default=None, help="database path (defaults to log.db next to this script)")
+    parser.add_argument("--participant", default=None)
+    parser.add_argument("--difficulty", default=None)
+    parser.add_argument("--since", default=None, help="first day to include, YYYY-MM-DD")
+    parser.add_argument("--by-day", action="store_true", help="one row per day")
+    parser.add_argument("--positions", action="store_true", help="show the serial-position error curve")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the aggregates from the raw rounds")
+    args = parser.parse_args(argv)
+
+    if args.rebuild:
+        print(f"Rebuilt aggregates from {rebuild(args.db)} rounds.")
+        return
+    if args.positions:
+        for pos, trials, rate in position_curve(args.participant, args.difficulty, args.db):
+            print(f"  position {pos + 1:>3}  trials={trials:<8} error_rate={rate:.3f}")
+        return
+    for s in summary(args.participant, args.difficulty, args.since, args.by_day, args.db):
+        label = f"{s['participant'] or '-'} / {s['difficulty'] or '-'}" + (f" / {s['day']}" if args.by_day else "")
+        mean_time = f"{s['mean_time']:.2f}s" if s['mean_time'] is not None else "-"
+        print(f"  {label:<32} rounds={s['rounds']:<7} accuracy={s['accuracy']:.3f} "
+              f"mean_errors={s['mean_errors']:.2f} mean_time={mean_time}")
+
+
+if __name__ == "__main__":
+    main()
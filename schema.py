@@ -0,0 +1,316 @@
+"""Versioned schema of log.db.
+
+Every table and index lives here, as an ordered list of migrations. The
+database records how many of them it has applied in ``PRAGMA user_version``,
+so opening an up-to-date database costs one cheap query: `migrate` reads the
+version and returns right away. Otherwise it takes the write lock, re-reads
+the version (another process may have just migrated) and applies the
+pending migrations plus the new version number in one transaction.
+
+Migrations are written to be idempotent, so databases created before
+versioning (user_version 0, any mix of tables and columns) upgrade through
+the same path as new ones. Append new migrations to `MIGRATIONS`; never
+edit or reorder the existing ones.
+
+`connect` opens a connection with the PRAGMAs every reader and writer
+uses. ``python init_db.py`` creates or upgrades log.db from the command line.
+"""
+
+from pathlib import Path
+import sqlite3
+
+PRAGMAS = (
+    "busy_timeout=5000",
+    # Only takes effect on a new, empty database (and must precede the switch
+    # to WAL); lets `log_retention` give pages back with `incremental_vacuum`.
+    "auto_vacuum=INCREMENTAL",
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    # Page cache in KiB (negative) and memory-mapped reads, per connection.
+    "cache_size=-8192",
+    "mmap_size=67108864",
+)
+
+
+def connect(db: Path, create: bool = True) -> sqlite3.Connection:
+    """Open a connection in WAL mode so readers never block the writer.
+
+    With ``create=False`` a missing database raises FileNotFoundError instead
+    of being created empty (readers that would only find nothing in it).
+    """
+    if create:
+        conn = sqlite3.connect(db)
+    else:
+        if not Path(db).is_file():
+            raise FileNotFoundError(f"no database at {db}")
+        conn = sqlite3.connect(Path(db).resolve().as_uri() + "?mode=rw", uri=True)
+    for pragma in PRAGMAS:
+        conn.execute("PRAGMA " + pragma)
+    return conn
+
+
+def _has_table(cur, name: str) -> bool:
+    return cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+
+def _add_columns(cur, table: str, columns) -> list:
+    """Add the `(name, type)` columns `table` doesn't have yet; returns the added names."""
+    existing = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+    added = []
+    for name, kind in columns:
+        if name not in existing:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {name} {kind}")
+            added.append(name)
+    return added
+
+
+def _base_tables(cur):
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL DEFAULT (datetime('now')),
+            level TEXT,
+            message TEXT
+        )
+        """
+    )
+    # Structured round data for experiments; `meta` and `data` keep the
+    # original payload (see `logger_sqlite.save_round`).
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rounds (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL DEFAULT (datetime('now')),
+            meta TEXT,
+            data TEXT
+        )
+        """
+    )
+
+
+def _typed_rounds(cur):
+    """Typed `rounds` columns and per-item `round_items`, backfilled from the JSON payload."""
+    added = _add_columns(cur, "rounds", (("difficulty", "TEXT"), ("item_count", "INTEGER"), ("elapsed", "REAL"),
+                                         ("correct", "INTEGER"), ("errors", "INTEGER")))
+    # Value columns have no type so digits stay integers and words stay text.
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS round_items (
+            round_id INTEGER NOT NULL REFERENCES rounds(id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            user_value,
+            key_value,
+            is_correct INTEGER NOT NULL,
+            PRIMARY KEY (round_id, position)
+        ) WITHOUT ROWID
+        """
+    )
+    if not added:
+        return
+    import json
+
+    import round_codec
+
+    # A snapshot of how rounds were split into columns when this migration
+    # was written; later changes to `logger_sqlite` must not alter it.
+    round_codec.load_vocabularies(cur)
+    for round_id, meta, data in cur.execute("SELECT id, meta, data FROM rounds WHERE data IS NOT NULL").fetchall():
+        try:
+            metadata, payload = json.loads(meta or "{}"), round_codec.loads_data(data)
+            items, answer = payload.get("items"), payload.get("answer") or []
+            item_rows = [(pos, None if pos >= len(answer) else user, key, int(bool(ok)))
+                         for pos, (user, key, ok) in enumerate(payload.get("details") or [])]
+            correct, errors = payload.get("correct"), metadata.get("errors")
+            if errors is None and item_rows:
+                errors = sum(1 for row in item_rows if not row[3])
+            difficulty = metadata.get("difficulty")
+            columns = (None if difficulty is None else str(difficulty),
+                       metadata.get("items", len(items) if items is not None else None),
+                       metadata.get("time"), None if correct is None else int(bool(correct)), errors)
+        except (ValueError, TypeError, AttributeError):
+            continue  # leave malformed legacy rows untyped
+        cur.execute(
+            "UPDATE rounds SET difficulty = ?, item_count = ?, elapsed = ?, correct = ?, errors = ? WHERE id = ?",
+            (*columns, round_id),
+        )
+        cur.executemany(
+            "INSERT INTO round_items (round_id, position, user_value, key_value, is_correct) VALUES (?, ?, ?, ?, ?)",
+            [(round_id, *row) for row in item_rows],
+        )
+
+
+def _participant(cur):
+    if _add_columns(cur, "rounds", (("participant", "TEXT"),)):
+        cur.execute("UPDATE rounds SET participant = json_extract(meta, '$.participant') WHERE json_valid(meta)")
+
+
+def _indexes(cur):
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_rounds_timestamp ON rounds (timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_rounds_difficulty ON rounds (difficulty, timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_rounds_participant ON rounds (participant, timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_logs_level_timestamp ON logs (level, timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs (timestamp)")
+
+
+def _stats_tables(cur):
+    """Materialized aggregates, kept up to date by `logger_sqlite` as rounds are inserted.
+
+    Missing participant/difficulty are stored as ''. Sums of squares let
+    readers derive variances without the raw rows.
+    """
+    existed = _has_table(cur, "round_stats")
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS round_stats (
+            participant TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            day TEXT NOT NULL,
+            rounds INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            items INTEGER NOT NULL,
+            errors INTEGER NOT NULL,
+            errors_sq INTEGER NOT NULL,
+            timed INTEGER NOT NULL,
+            elapsed REAL NOT NULL,
+            elapsed_sq REAL NOT NULL,
+            PRIMARY KEY (participant, difficulty, day)
+        ) WITHOUT ROWID
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS position_stats (
+            participant TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            trials INTEGER NOT NULL,
+            errors INTEGER NOT NULL,
+            PRIMARY KEY (participant, difficulty, position)
+        ) WITHOUT ROWID
+        """
+    )
+    if not existed:
+        rebuild_stats(cur)
+
+
+def _journal_replays(cur):
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS journal_replays "
+        "(file TEXT PRIMARY KEY, generation INTEGER NOT NULL, offset INTEGER NOT NULL)"
+    )
+
+
+def _vocabularies(cur):
+    """Word lists of the `round_codec` records in ``rounds.data``, by fingerprint."""
+    cur.execute("CREATE TABLE IF NOT EXISTS vocabularies (fingerprint INTEGER PRIMARY KEY, words TEXT NOT NULL)")
+    import round_codec
+
+    # Records already stored were encoded with a vocabulary this code registers.
+    round_codec.save_vocabulary(cur)
+
+
+def _maintenance(cur):
+    """Key/value bookkeeping of `log_retention` (e.g. when the last full VACUUM ran)."""
+    cur.execute("CREATE TABLE IF NOT EXISTS maintenance (key TEXT PRIMARY KEY, value TEXT)")
+
+
+def _staircase_state(cur):
+    """Latest `adaptive` staircase state per participant ('' when missing), seeded from round metadata."""
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS staircase_state (
+            participant TEXT PRIMARY KEY,
+            timestamp TEXT NOT NULL,
+            state TEXT NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+    cur.execute(
+        """
+        INSERT OR REPLACE INTO staircase_state
+        SELECT coalesce(participant, ''), timestamp, state
+        FROM (SELECT id, participant, timestamp,
+                     json_extract(CASE WHEN json_valid(meta) THEN meta END, '$.staircase') AS state
+              FROM rounds)
+        WHERE state IS NOT NULL
+        ORDER BY timestamp, id
+        """
+    )
+
+
+# Index + 1 is the user_version a database has once the migration is applied.
+MIGRATIONS = (
+    _base_tables,
+    _typed_rounds,
+    _participant,
+    _indexes,
+    _stats_tables,
+    _journal_replays,
+    _vocabularies,
+    _maintenance,
+    _staircase_state,
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def rebuild_stats(cur):
+    """Recompute `round_stats` and `position_stats` from `rounds` and `round_items`."""
+    cur.execute("DELETE FROM round_stats")
+    cur.execute("DELETE FROM position_stats")
+    cur.execute(
+        """
+        INSERT INTO round_stats
+        SELECT coalesce(participant, ''), coalesce(difficulty, ''), date(timestamp), COUNT(*),
+               SUM(coalesce(correct, 0)), SUM(coalesce(item_count, 0)),
+               SUM(coalesce(errors, 0)), SUM(coalesce(errors, 0) * coalesce(errors, 0)),
+               COUNT(elapsed), TOTAL(elapsed), TOTAL(elapsed * elapsed)
+        FROM rounds
+        GROUP BY 1, 2, 3
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO position_stats
+        SELECT coalesce(r.participant, ''), coalesce(r.difficulty, ''), i.position, COUNT(*), SUM(1 - i.is_correct)
+        FROM round_items AS i JOIN rounds AS r ON r.id = i.round_id
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Bring the database up to `SCHEMA_VERSION`; returns the number of migrations applied.
+
+    Raises RuntimeError for a database written by a newer schema.
+    """
+    current = version(conn)
+    if current == SCHEMA_VERSION:
+        return 0
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # transactions are explicit below
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = version(conn)
+            if current > SCHEMA_VERSION:
+                raise RuntimeError(f"database schema version {current} is newer than this code ({SCHEMA_VERSION})")
+            cur = conn.cursor()
+            for step in MIGRATIONS[current:]:
+                step(cur)
+            # PRAGMAs can't take parameters; SCHEMA_VERSION is a plain int.
+            cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION:d}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.isolation_level = isolation_level
+    return SCHEMA_VERSION - current
+
+
+__all__ = ["connect", "migrate", "version", "rebuild_stats", "MIGRATIONS", "SCHEMA_VERSION", "PRAGMAS"]
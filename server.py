@@ -0,0 +1,438 @@
+"""Local HTTP service: the web client's static files plus a JSON API over `game_core`.
+
+A small HTTP/1.1 server on plain `asyncio` streams (no dependencies), with
+keep-alive connections, meant to replace ``python -m http.server``.
+
+Static files under ``public/`` are loaded once at startup. Compressible files
+are pre-compressed with gzip (and brotli when the ``brotli`` package is
+installed), or taken from the ``.gz``/``.br`` files `build_assets` writes next
+to them; each response picks the best encoding the client accepts. Every
+encoding of a file gets its own strong ETag, so revalidation answers
+``304 Not Modified``. HTML pages must be revalidated on every load
+(``no-cache``); other assets are cached for `ASSET_MAX_AGE` seconds.
+
+JSON API (request and response bodies are JSON):
+
+    GET  /api/presets                  difficulty presets
+    GET  /api/sequence?level=2         one sequence (or min, max, word_interval; optional seed)
+    POST /api/sequences                {"count": n, "level": "2"} -> n sequences
+    POST /api/check                    {"answer": [...] or "1, 2, apple", "key": [...]}
+    POST /api/check/batch              {"rounds": [{"answer": ..., "key": ...}, ...]}
+    POST /api/rounds                   {"metadata": {...}, "items": [...], "answer": ...}
+                                       scored server-side and stored with `logger_sqlite`
+    GET  /api/stats?participant=...    per-difficulty summary from `round_stats`
+    GET  /metrics                      `metrics` snapshot, Prometheus text (STM_METRICS=1)
+
+Usage:
+    python server.py --port 8000
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import mimetypes
+from pathlib import Path
+import random
+import traceback
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import logger_sqlite
+import metrics
+import round_stats
+from static_assets import COMPRESSIBLE, MIN_COMPRESS_BYTES, PRECOMPRESSED, PUBLIC_DIR
+from game_core import (WORDS, AnswerParseError, Vocabulary, _validate_bounds, check_answer, convert_user_input,
+                       difficulty_presets, generate_sequence)
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+ASSET_MAX_AGE = 86400
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH = 10000
+# Longest sequence (digits) the API generates; a request can ask for MAX_BATCH of them.
+MAX_SEQUENCE_LENGTH = 100
+KEEPALIVE_TIMEOUT = 15
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large", 431: "Request Header Fields Too Large",
+           500: "Internal Server Error"}
+
+_VOCABULARY = Vocabulary(WORDS)
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(message or REASONS.get(status, ""))
+        self.status = status
+
+
+class StaticFile:
+    """One file of ``public/`` with its precomputed encodings and their ETags."""
+
+    __slots__ = ("content_type", "etags", "cache_control", "bodies")
+
+    def __init__(self, path: Path):
+        raw = path.read_bytes()
+        self.content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        if self.content_type.startswith("text/") or self.content_type in ("application/javascript", "application/json"):
+            self.content_type += "; charset=utf-8"
+        digest = hashlib.sha256(raw).hexdigest()[:32]
+        self.cache_control = "no-cache" if path.suffix == ".html" else f"public, max-age={ASSET_MAX_AGE}"
+        # Encodings in order of preference; identity always last.
+        self.bodies: Dict[str, bytes] = {}
+        if len(raw) >= MIN_COMPRESS_BYTES and self.content_type.startswith(COMPRESSIBLE):
+            br = _precompressed(path, ".br", raw) or (brotli.compress(raw, quality=11) if brotli else None)
+            gz = _precompressed(path, ".gz", raw) or gzip.compress(raw, compresslevel=9, mtime=0)
+            candidates = [("br", br), ("gzip", gz)]
+            for encoding, body in candidates:
+                if body is not None and len(body) < len(raw):
+                    self.bodies[encoding] = body
+        self.bodies["identity"] = raw
+        # Strong ETags promise byte-identical bodies, so each encoding gets its own.
+        self.etags = {encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+                      for encoding in self.bodies}
+
+    def pick(self, accept_encoding: str) -> Tuple[str, bytes]:
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding, body in self.bodies.items():
+            if encoding == "identity" or encoding in accepted:
+                return encoding, body
+        return "identity", self.bodies["identity"]
+
+
+def _precompressed(path: Path, suffix: str, raw: bytes) -> Optional[bytes]:
+    """The ``path + suffix`` variant written by `build_assets`, if it decodes to `raw`."""
+    variant = path.with_name(path.name + suffix)
+    if (suffix == ".br" and brotli is None) or not variant.is_file():
+        return None
+    body = variant.read_bytes()
+    try:
+        decoded = brotli.decompress(body) if suffix == ".br" else gzip.decompress(body)
+    except Exception:
+        return None
+    # A stale variant (source edited since the last build) is ignored.
+    return body if decoded == raw else None
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def load_static(root: Path = PUBLIC_DIR) -> Dict[str, StaticFile]:
+    """Map URL paths to `StaticFile`s for every file under `root` ("/" serves index.html)."""
+    files = {}
+    for path in sorted(Path(root).rglob("*")):
+        # Precompressed variants are served through their source file.
+        if path.suffix in PRECOMPRESSED and path.with_suffix("").is_file():
+            continue
+        if path.is_file():
+            files["/" + path.relative_to(root).as_posix()] = StaticFile(path)
+    if "/index.html" in files:
+        files["/"] = files["/index.html"]
+    return files
+
+
+# ---- API ----
+
+def _condition(params: Dict[str, Any]) -> Tuple[int, int, int]:
+    if "level" in params:
+        preset = difficulty_presets().get(str(params["level"]))
+        if preset is None:
+            raise HTTPError(400, f"unknown level {params['level']!r}")
+        return preset["min"], preset["max"], preset["word_interval"]
+    try:
+        values = [params["min"], params["max"], params.get("word_interval", 2)]
+    except KeyError:
+        raise HTTPError(400, "give either level or min and max") from None
+    try:
+        if any(isinstance(v, (bool, float)) for v in values):
+            raise TypeError
+        minimum, maximum, interval = map(int, values)
+    except (TypeError, ValueError):
+        raise HTTPError(400, "min, max and word_interval must be integers") from None
+    try:
+        _validate_bounds(minimum, maximum)
+    except ValueError as exc:
+        raise HTTPError(400, str(exc)) from None
+    if maximum > MAX_SEQUENCE_LENGTH:
+        raise HTTPError(400, f"max must be <= {MAX_SEQUENCE_LENGTH}")
+    if interval < 1:
+        raise HTTPError(400, "word_interval must be >= 1")
+    return minimum, maximum, interval
+
+
+def _rng(params: Dict[str, Any]) -> random.Random:
+    seed = params.get("seed")
+    return random.Random(str(seed)) if seed is not None else random.Random()
+
+
+def _answer(value: Any) -> list:
+    if isinstance(value, str):
+        try:
+            return convert_user_input(value, _VOCABULARY)
+        except AnswerParseError as exc:
+            raise HTTPError(400, str(exc)) from None
+    if isinstance(value, list):
+        return value
+    raise HTTPError(400, "answer must be a list or a comma-separated string")
+
+
+def _check_values(values: list, name: str) -> list:
+    # bool is an int subclass, but True would silently score as 1.
+    if any(isinstance(v, bool) or not isinstance(v, (int, float, str)) for v in values):
+        raise HTTPError(400, f"{name} must contain only numbers or strings")
+    return values
+
+
+def _score(answer: Any, key: Any, key_name: str = "key") -> Dict[str, Any]:
+    if not isinstance(key, list):
+        raise HTTPError(400, f"{key_name} must be a list")
+    _check_values(key, key_name)
+    answer = _check_values(_answer(answer), "answer")
+    correct, errors, details = check_answer(answer, key)
+    return {"answer": answer, "correct": correct, "errors": errors, "details": details}
+
+
+def _batch(items: Any, name: str) -> list:
+    if not isinstance(items, list):
+        raise HTTPError(400, f"{name} must be a list")
+    if len(items) > MAX_BATCH:
+        raise HTTPError(413, f"at most {MAX_BATCH} {name} per request")
+    return items
+
+
+def api_presets(query, body, db):
+    return difficulty_presets()
+
+
+def api_sequence(query, body, db):
+    minimum, maximum, interval = _condition(query)
+    items, _ = generate_sequence(minimum, maximum, _VOCABULARY, interval, rng=_rng(query))
+    return {"items": items}
+
+
+def api_sequences(query, body, db):
+    count = body.get("count", 1)
+    if isinstance(count, bool) or not isinstance(count, int) or not 0 < count <= MAX_BATCH:
+        raise HTTPError(400, f"count must be an integer in 1..{MAX_BATCH}")
+    minimum, maximum, interval = _condition(body)
+    rng = _rng(body)
+    return {"sequences": [generate_sequence(minimum, maximum, _VOCABULARY, interval, rng=rng)[0]
+                          for _ in range(count)]}
+
+
+def api_check(query, body, db):
+    return _score(body.get("answer"), body.get("key"))
+
+
+def api_check_batch(query, body, db):
+    rounds = _batch(body.get("rounds"), "rounds")
+    try:
+        return {"results": [_score(r.get("answer"), r.get("key")) for r in rounds]}
+    except AttributeError:
+        raise HTTPError(400, "each round must be an object") from None
+
+
+async def api_rounds(query, body, db):
+    metadata = body.get("metadata")
+    if metadata is None:
+        metadata = {}
+    elif not isinstance(metadata, dict):
+        raise HTTPError(400, "metadata must be an object")
+    items = body.get("items")
+    scored = _score(body.get("answer"), items, "items")
+    metadata = {**metadata, "items": len(items), "errors": scored["errors"], "source": "http"}
+    data = {"items": items, "answer": scored["answer"], "details": scored["details"], "correct": scored["correct"]}
+    await logger_sqlite.asave_round(metadata, data, db)
+    return {"saved": True, "correct": scored["correct"], "errors": scored["errors"]}
+
+
+async def api_stats(query, body, db):
+    # SQLite reads are blocking; keep them off the event loop.
+    return {"summary": await asyncio.to_thread(round_stats.summary, query.get("participant"),
+                                               query.get("difficulty"), query.get("since"), path=db)}
+
+
+# Handlers take ``(query, body, db)``; `db` is the log database (None: logger_sqlite's default).
+ROUTES = {
+    ("GET", "/api/presets"): api_presets,
+    ("GET", "/api/sequence"): api_sequence,
+    ("POST", "/api/sequences"): api_sequences,
+    ("POST", "/api/check"): api_check,
+    ("POST", "/api/check/batch"): api_check_batch,
+    ("POST", "/api/rounds"): api_rounds,
+    ("GET", "/api/stats"): api_stats,
+}
+
+
+# ---- HTTP ----
+
+def _response(status: int, headers: Dict[str, str], body: bytes = b"", head_only: bool = False) -> bytes:
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+    headers.setdefault("Content-Length", str(len(body)))
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (b"" if head_only else body)
+
+
+def _json_response(status: int, payload: Any) -> bytes:
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return _response(status, {"Content-Type": "application/json", "Cache-Control": "no-store"}, body)
+
+
+class Server:
+    """Serves `static` files and the JSON API; see the module docstring."""
+
+    def __init__(self, static: Dict[str, StaticFile] = None, db: Path = None):
+        self.static = load_static() if static is None else static
+        self.db = db
+
+    async def handle(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> bytes:
+        url = urlsplit(target)
+        path = unquote(url.path)
+        if path == "/metrics" and method == "GET":
+            return _response(200, {"Content-Type": "text/plain; version=0.0.4", "Cache-Control": "no-store"},
+                             metrics.prometheus().encode("utf-8"))
+        if path.startswith("/api/"):
+            handler = ROUTES.get((method, path))
+            if handler is None:
+                allowed = any(p == path for _, p in ROUTES)
+                raise HTTPError(405 if allowed else 404)
+            query = dict(parse_qsl(url.query))
+            payload = {}
+            if body:
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    raise HTTPError(400, "body is not valid JSON") from None
+                if not isinstance(payload, dict):
+                    raise HTTPError(400, "body must be a JSON object")
+            try:
+                result = handler(query, payload, self.db)
+                if asyncio.iscoroutine(result):
+                    result = await result
+            except ValueError as exc:  # e.g. invalid bounds from `generate_sequence`
+                raise HTTPError(400, str(exc)) from None
+            return _json_response(200, result)
+
+        if method not in ("GET", "HEAD"):
+            raise HTTPError(405)
+        entry = self.static.get(path)
+        if entry is None:
+            raise HTTPError(404)
+        encoding, data = entry.pick(headers.get("accept-encoding", ""))
+        etag = entry.etags[encoding]
+        common = {"ETag": etag, "Cache-Control": entry.cache_control, "Vary": "Accept-Encoding"}
+        if etag in (t.strip() for t in headers.get("if-none-match", "").split(",")):
+            return _response(304, common)
+        common["Content-Type"] = entry.content_type
+        if encoding != "identity":
+            common["Content-Encoding"] = encoding
+        return _response(200, common, data, head_only=method == "HEAD")
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    writer.write(_json_response(431, {"error": REASONS[431]}))
+                    return
+                keep_alive = await self._serve_request(head, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def _serve_request(self, head: bytes, reader, writer) -> bool:
+        keep_alive = False
+        try:
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            try:
+                method, target, version = request_line.split(" ")
+            except ValueError:
+                raise HTTPError(400, "malformed request line") from None
+            headers = {}
+            for line in header_lines:
+                if line:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+            if "chunked" in headers.get("transfer-encoding", "").lower():
+                keep_alive = False
+                raise HTTPError(411)
+            try:
+                length = int(headers.get("content-length", 0))
+            except ValueError:
+                keep_alive = False
+                raise HTTPError(400, "bad Content-Length") from None
+            if length > MAX_BODY_BYTES:
+                keep_alive = False
+                raise HTTPError(413)
+            body = await reader.readexactly(length) if length else b""
+            with metrics.span("http.request"):
+                response = await self.handle(method.upper(), target, headers, body)
+        except HTTPError as exc:
+            metrics.count(f"http.status.{exc.status}")
+            response = _json_response(exc.status, {"error": str(exc)})
+        except asyncio.IncompleteReadError:
+            return False
+        except Exception:
+            logger_sqlite.log("Unhandled error serving %r:\n%s", head[:200], traceback.format_exc(), level="ERROR")
+            response = _json_response(500, {"error": REASONS[500]})
+        writer.write(response)
+        return keep_alive
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8000, static_dir: Path = PUBLIC_DIR,
+                ready: Optional[asyncio.Event] = None, db: Path = None):
+    """Run the server until cancelled; logs and rounds go to `db` (default: log.db)."""
+    logger_sqlite.init_db(db)
+    server = Server(load_static(static_dir), db)
+    srv = await asyncio.start_server(server.serve_connection, host, port, limit=MAX_HEADER_BYTES)
+    logger_sqlite.log("HTTP server listening on %s:%d (%d static files, brotli=%s)",
+                      host, port, len(server.static), brotli is not None, level="INFO", path=db)
+    if ready is not None:
+        ready.set()
+    async with srv:
+        await srv.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve public/ and the game_core JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--public", default=str(PUBLIC_DIR), help="static files directory")
+    parser.add_argument("--db", default=None, help="log database (defaults to log.db next to this script)")
+    args = parser.parse_args(argv)
+    print(f"Serving {args.public} and /api on http://{args.host}:{args.port}/")
+    try:
+        asyncio.run(serve(args.host, args.port, Path(args.public), db=args.db and Path(args.db)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
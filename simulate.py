@@ -0,0 +1,241 @@
+"""Simulated participants and parallel parameter sweeps over `game_core`.
+
+A participant model turns an answer key into a (possibly wrong) answer.
+Models are small picklable dataclasses so sweeps can run them in worker
+processes:
+
+- `SpanLimited`: recalls the first ``span`` items perfectly, nothing after
+- `PositionDecay`: recall probability falls off with serial position
+- `ModalityError`: separate error rates for digits and words
+
+`sweep` plays rounds through `generate_sequence` and `check_answer` for every
+condition of a grid (the `difficulty_presets` or custom
+``(min, max, word_interval)`` triples) on a `ProcessPoolExecutor`. Work is
+split into fixed-size tasks, each with its own seed derived from the sweep
+seed, so results do not depend on the number of workers or on scheduling.
+Finished tasks are streamed into the rounds store in order while the next
+ones run.
+
+Usage:
+    python simulate.py --model decay --trials 100000 --workers 8 --db sim.db
+"""
+
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+import os
+import random
+import time
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import logger_sqlite
+from game_core import WORDS, Vocabulary, check_answer, difficulty_presets, generate_sequence
+
+# Trials per task handed to a worker process.
+CHUNK_SIZE = 2000
+# Placeholder a model "answers" when it misremembers a word.
+FORGOTTEN_WORD = "?"
+
+
+@dataclass
+class Participant:
+    """Base model: perfect recall, answering at `seconds_per_item`."""
+    seconds_per_item: float = 0.8
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+    def recalls(self, position: int, item: Any, rng: random.Random) -> bool:
+        """Return True if the item at `position` (0-based) is recalled."""
+        return True
+
+    def respond(self, key: List[Any], rng: random.Random) -> List[Any]:
+        """Produce this participant's answer to `key`."""
+        return [item if self.recalls(pos, item, rng) else _misremember(item, rng)
+                for pos, item in enumerate(key)]
+
+    def response_time(self, answer: List[Any], rng: random.Random) -> float:
+        return len(answer) * self.seconds_per_item * rng.uniform(0.75, 1.25)
+
+
+def _misremember(item: Any, rng: random.Random) -> Any:
+    if isinstance(item, int):
+        return (item + rng.randint(1, 9)) % 10
+    return FORGOTTEN_WORD
+
+
+@dataclass
+class SpanLimited(Participant):
+    """Recalls the first `span` items and stops there."""
+    span: int = 7
+
+    def respond(self, key, rng):
+        return list(key[:self.span])
+
+
+@dataclass
+class PositionDecay(Participant):
+    """Recalls position ``i`` with probability ``p_first * (1 - decay) ** i``."""
+    p_first: float = 0.98
+    decay: float = 0.04
+
+    def recalls(self, position, item, rng):
+        return rng.random() < self.p_first * (1 - self.decay) ** position
+
+
+@dataclass
+class ModalityError(Participant):
+    """Misremembers digits and words independently at different rates."""
+    p_digit_error: float = 0.05
+    p_word_error: float = 0.15
+
+    def recalls(self, position, item, rng):
+        p = self.p_digit_error if isinstance(item, int) else self.p_word_error
+        return rng.random() >= p
+
+
+MODELS = {"perfect": Participant, "span": SpanLimited, "decay": PositionDecay, "modality": ModalityError}
+
+
+@dataclass(frozen=True)
+class Condition:
+    """One grid point: sequence bounds and word interval, plus a label."""
+    minimum: int
+    maximum: int
+    word_interval: int
+    label: str = ""
+
+    @property
+    def name(self) -> str:
+        return self.label or f"{self.minimum}-{self.maximum}/{self.word_interval}"
+
+
+def preset_conditions() -> List[Condition]:
+    """The `difficulty_presets` as sweep conditions, labelled '1'..'4'."""
+    return [Condition(p["min"], p["max"], p["word_interval"], key) for key, p in difficulty_presets().items()]
+
+
+def grid(minimums: Iterable[int], spans: Iterable[int], word_intervals: Iterable[int]) -> List[Condition]:
+    """Cartesian grid of conditions with ``maximum = minimum + span``."""
+    spans, word_intervals = list(spans), list(word_intervals)
+    return [Condition(lo, lo + span, wi) for lo in minimums for span in spans for wi in word_intervals]
+
+
+def _play(model: Participant, condition: Condition, trials: int, seed: str,
+          words: Sequence[str]) -> List[Tuple[dict, dict]]:
+    """Worker: play `trials` rounds and return them as `save_round` payloads."""
+    rng = random.Random(seed)
+    vocabulary = Vocabulary(words)
+    rounds = []
+    for _ in range(trials):
+        items, key = generate_sequence(condition.minimum, condition.maximum, vocabulary, condition.word_interval,
+                                       rng=rng)
+        answer = model.respond(key, rng)
+        correct, errors, details = check_answer(answer, key)
+        metadata = {
+            "time": model.response_time(answer, rng),
+            "items": len(items),
+            "difficulty": condition.name,
+            "errors": errors,
+            "participant": model.name,
+            "simulated": True,
+        }
+        rounds.append((metadata, {"items": items, "answer": answer, "details": details, "correct": correct}))
+    return rounds
+
+
+def _tasks(conditions: Sequence[Condition], trials: int, seed: int, chunk_size: int):
+    for ci, condition in enumerate(conditions):
+        for k, start in enumerate(range(0, trials, chunk_size)):
+            # String seeds hash deterministically (unlike hash() of a tuple).
+            yield condition, min(chunk_size, trials - start), f"{seed}:{ci}:{k}"
+
+
+def sweep(model: Participant, conditions: Sequence[Condition] = None, trials: int = 1000, seed: int = 0,
+          workers: int = None, chunk_size: int = CHUNK_SIZE, words: Sequence[str] = WORDS,
+          persist: bool = True, path=None) -> Dict[str, Dict[str, float]]:
+    """Run `trials` simulated rounds per condition and return per-condition stats.
+
+    Stats per condition name: ``trials``, ``accuracy``, ``mean_errors`` and
+    ``mean_time``. With `persist`, every round is also queued to the rounds
+    store via `logger_sqlite.save_round` as soon as its task finishes.
+    """
+    conditions = list(conditions) if conditions is not None else preset_conditions()
+    workers = workers or os.cpu_count() or 1
+    stats = {c.name: {"trials": 0, "correct": 0, "errors": 0, "time": 0.0} for c in conditions}
+    if persist:
+        logger_sqlite.init_db(path)
+
+    tasks = _tasks(conditions, trials, seed, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # A bounded window of in-flight tasks, consumed in submission order:
+        # memory stays flat and the rounds table fills deterministically.
+        pending = deque()
+        for condition, n, task_seed in tasks:
+            pending.append(pool.submit(_play, model, condition, n, task_seed, words))
+            if len(pending) >= 2 * workers:
+                _collect(pending.popleft().result(), stats, persist, path)
+        while pending:
+            _collect(pending.popleft().result(), stats, persist, path)
+    if persist:
+        logger_sqlite.flush(path)
+
+    return {
+        name: {
+            "trials": s["trials"],
+            "accuracy": s["correct"] / s["trials"] if s["trials"] else 0.0,
+            "mean_errors": s["errors"] / s["trials"] if s["trials"] else 0.0,
+            "mean_time": s["time"] / s["trials"] if s["trials"] else 0.0,
+        }
+        for name, s in stats.items()
+    }
+
+
+def _collect(rounds: List[Tuple[dict, dict]], stats: Dict[str, Dict[str, float]], persist: bool, path):
+    for metadata, data in rounds:
+        s = stats[metadata["difficulty"]]
+        s["trials"] += 1
+        s["correct"] += data["correct"]
+        s["errors"] += metadata["errors"]
+        s["time"] += metadata["time"]
+        if persist:
+            logger_sqlite.save_round(metadata, data, path=path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run simulated participants over difficulty conditions.")
+    parser.add_argument("--model", choices=sorted(MODELS), default="decay")
+    parser.add_argument("--trials", type=int, default=1000, help="trials per condition")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--grid", default=None,
+                        help="custom conditions as MIN-MAX/INTERVAL,... (defaults to the difficulty presets)")
+    parser.add_argument("--db", default=None, help="rounds database (defaults to log.db next to this script)")
+    parser.add_argument("--no-persist", action="store_true", help="only print stats, don't store rounds")
+    args = parser.parse_args(argv)
+
+    conditions = None
+    if args.grid:
+        conditions = []
+        for spec in args.grid.split(","):
+            bounds, _, interval = spec.partition("/")
+            lo, _, hi = bounds.partition("-")
+            conditions.append(Condition(int(lo), int(hi or lo), int(interval or 2)))
+
+    model = MODELS[args.model]()
+    start = time.perf_counter()
+    results = sweep(model, conditions, args.trials, args.seed, args.workers,
+                    persist=not args.no_persist, path=args.db)
+    elapsed = time.perf_counter() - start
+    print(f"model={model.name} {asdict(model)}")
+    for name, r in results.items():
+        print(f"  {name:<12} trials={r['trials']:<8} accuracy={r['accuracy']:.3f} "
+              f"mean_errors={r['mean_errors']:.2f} mean_time={r['mean_time']:.2f}s")
+    total = sum(r["trials"] for r in results.values())
+    print(f"{total} trials in {elapsed:.1f}s ({total / elapsed:,.0f} trials/s)")
+
+
+if __name__ == "__main__":
+    main()
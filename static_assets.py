@@ -0,0 +1,15 @@
+"""Where the web client's static files live and which of them are compressed.
+
+Shared by `server` (which serves them) and `build_assets` (which writes their
+precompressed variants), so the build doesn't have to import the server.
+"""
+
+from pathlib import Path
+
+PUBLIC_DIR = Path(__file__).with_name("public")
+# Below this size compression doesn't pay for the extra header.
+MIN_COMPRESS_BYTES = 256
+COMPRESSIBLE = ("text/", "application/json", "application/manifest+json", "application/javascript", "image/svg+xml",
+                "image/x-icon", "image/vnd.microsoft.icon", "audio/wav", "audio/x-wav")
+# Suffixes of the precompressed files next to their sources.
+PRECOMPRESSED = (".gz", ".br")
@@ -0,0 +1,92 @@
+"""Stimulus presentation scheduler with drift measurement.
+
+Items are shown back to back for a fixed exposure. Every onset is scheduled
+against an absolute deadline computed from the start of the round (not from
+the previous item), so late wake-ups or slow screen updates never accumulate
+across the sequence. Waiting uses `time.perf_counter`: a coarse `sleep` up to
+shortly before the deadline, then a short spin for the remainder.
+
+The measured onset/offset times are returned so they can be stored with the
+round and the exposure verified from data.
+"""
+
+from dataclasses import dataclass, field
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+# Default exposure per item, in seconds.
+EXPOSURE = 2.0
+# Below this much remaining time we spin instead of sleeping, because OS
+# sleeps routinely overshoot by a millisecond or more.
+SPIN_THRESHOLD = 0.002
+
+
+def sleep_until(deadline: float, clock: Callable[[], float] = time.perf_counter) -> None:
+    """Wait until `clock()` reaches `deadline` (a `perf_counter` timestamp)."""
+    while True:
+        remaining = deadline - clock()
+        if remaining <= 0:
+            return
+        if remaining > SPIN_THRESHOLD:
+            time.sleep(remaining - SPIN_THRESHOLD)
+
+
+@dataclass
+class PresentationTiming:
+    """Measured timing of one presented sequence.
+
+    Attributes:
+        exposure: intended exposure per item, in seconds
+        onsets: when each item was on screen, relative to the scheduled first onset
+        offsets: when each item was cleared, on the same clock
+    """
+    exposure: float
+    onsets: List[float] = field(default_factory=list)
+    offsets: List[float] = field(default_factory=list)
+
+    @property
+    def drifts(self) -> List[float]:
+        """Lateness of each onset with respect to its schedule, in seconds."""
+        return [onset - i * self.exposure for i, onset in enumerate(self.onsets)]
+
+    @property
+    def exposures(self) -> List[float]:
+        """Actual on-screen time of each item, in seconds."""
+        return [off - on for on, off in zip(self.onsets, self.offsets)]
+
+    def to_metadata(self) -> Dict[str, Any]:
+        """Summarize the timing as a JSON-friendly dict for the round metadata."""
+        drifts = self.drifts
+        exposures = self.exposures
+        return {
+            "exposure": self.exposure,
+            "onsets": [round(t, 6) for t in self.onsets],
+            "offsets": [round(t, 6) for t in self.offsets],
+            "max_drift": max(drifts, default=0.0),
+            "mean_drift": sum(drifts) / len(drifts) if drifts else 0.0,
+            "max_exposure_error": max((abs(e - self.exposure) for e in exposures), default=0.0),
+        }
+
+
+def present(items: Sequence[Any], show: Callable[[Any], None], clear: Callable[[], None],
+            exposure: float = EXPOSURE, clock: Callable[[], float] = time.perf_counter) -> PresentationTiming:
+    """Show each item for `exposure` seconds and return the measured timing.
+
+    `show(item)` must put the item on screen (and flush), `clear()` remove it.
+    Item ``i`` is shown at ``start + i * exposure`` and cleared at
+    ``start + (i + 1) * exposure``.
+    """
+    timing = PresentationTiming(exposure=exposure)
+    start = clock()
+    for i, item in enumerate(items):
+        scheduled = start + i * exposure
+        sleep_until(scheduled, clock)
+        show(item)
+        timing.onsets.append(clock() - start)
+        sleep_until(scheduled + exposure, clock)
+        clear()
+        timing.offsets.append(clock() - start)
+    return timing
+
+
+__all__ = ["EXPOSURE", "PresentationTiming", "present", "sleep_until"]
@@ -0,0 +1,78 @@
+"""`convert_user_input` / `parse_answers` against the parser they replaced."""
+
+import io
+import random
+
+import pytest
+
+from game_core import WORDS, AnswerParseError, Vocabulary, convert_user_input, parse_answers
+
+VOCABULARY = Vocabulary(WORDS)
+# Tokens worth mixing: ASCII and other Unicode decimal digits, signs, decimals,
+# vocabulary words in odd case/spacing, and "²" (isdigit() but not int()).
+PIECES = ("0", "7", "42", "007", "٣", "１２", "-3", "3.5", "²", " ", "  ", ",", ",,", "\t",
+          "apple", "APPLE", "Ugli   fruit", "ugli fruit", "kiwi ", "zzz", "é")
+
+
+def baseline_convert(raw, vocabulary=None):
+    """`convert_user_input` before the shared tokenizer."""
+    parts = [p.strip() for p in raw.split(",") if p.strip()]
+    parsed = [int(p) if p.isdigit() else p for p in parts]
+    if vocabulary is not None:
+        parsed = [p if isinstance(p, int) else vocabulary.lookup(p) or p for p in parsed]
+    return parsed
+
+
+def _random_inputs(n, seed=0):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 12)))
+
+
+@pytest.mark.parametrize("vocabulary", [None, VOCABULARY], ids=["plain", "vocabulary"])
+def test_matches_baseline(vocabulary):
+    for raw in _random_inputs(20000):
+        try:
+            expected = baseline_convert(raw, vocabulary)
+        except ValueError:
+            with pytest.raises(AnswerParseError):
+                convert_user_input(raw, vocabulary)
+        else:
+            assert convert_user_input(raw, vocabulary) == expected, raw
+
+
+def test_examples():
+    assert convert_user_input("1, 2, apple") == [1, 2, "apple"]
+    assert convert_user_input(" 1 ,, -3, 3.5 ,") == [1, "-3", "3.5"]
+    assert convert_user_input("  Ugli   FRUIT, APPLE", VOCABULARY) == ["ugli fruit", "apple"]
+    assert convert_user_input("") == []
+
+
+def test_error_position():
+    with pytest.raises(AnswerParseError) as info:
+        convert_user_input("1, 2,  ²")
+    error = info.value
+    assert (error.line, error.column, error.token) == (1, 7, "²")
+    assert isinstance(error, ValueError)
+
+
+def test_parse_answers_lines():
+    lines = io.StringIO("1, apple\n\n3, ²\n4\n")
+    with pytest.raises(AnswerParseError) as info:
+        list(parse_answers(lines))
+    assert info.value.line == 3
+
+    results = list(parse_answers(["1, apple\n", "\n", "3, ²", "4"], errors="yield"))
+    assert results[:2] == [[1, "apple"], []]
+    assert isinstance(results[2], AnswerParseError) and results[2].column == 3
+    assert results[3] == [4]
+
+
+def test_parse_answers_matches_convert_user_input():
+    raws = [raw for raw in _random_inputs(2000, seed=1) if "²" not in raw and "\n" not in raw]
+    assert list(parse_answers(raws, VOCABULARY)) == [convert_user_input(raw, VOCABULARY) for raw in raws]
+
+
+def test_parse_answers_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        next(parse_answers(["1"], errors="ignore"))
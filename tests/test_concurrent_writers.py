@@ -0,0 +1,51 @@
+"""Several processes writing to one database through `logger_sqlite` at once."""
+
+import multiprocessing
+import sqlite3
+
+import pytest
+
+import logger_sqlite
+from game_core import check_answer
+
+WORKERS = 4
+WRITES = 50
+
+
+def _writer_process(db, start, journal):
+    logger_sqlite.set_round_journal(journal)
+    start.wait()
+    items = [1, 2, "apple", 3]
+    correct, errors, details = check_answer(items, items)
+    for i in range(WRITES):
+        logger_sqlite.log("write %d", i, path=db)
+        metadata = {"difficulty": 2, "time": 1.5, "items": len(items), "errors": errors}
+        logger_sqlite.save_round(metadata, {"items": items, "answer": items, "details": details, "correct": correct},
+                                 db)
+    logger_sqlite.close()
+
+
+@pytest.mark.parametrize("journal", [False, True], ids=["queue", "journal"])
+def test_processes_share_the_database(tmp_path, capfd, journal):
+    db = tmp_path / "log.db"
+    logger_sqlite.init_db(db)
+    logger_sqlite.close()
+    ctx = multiprocessing.get_context("spawn")
+    start = ctx.Event()
+    workers = [ctx.Process(target=_writer_process, args=(db, start, journal)) for _ in range(WORKERS)]
+    for worker in workers:
+        worker.start()
+    start.set()
+    for worker in workers:
+        worker.join(60)
+    assert [worker.exitcode for worker in workers] == [0] * WORKERS
+
+    with sqlite3.connect(db) as conn:
+        logs = conn.execute("SELECT COUNT(*) FROM logs WHERE message LIKE 'write %'").fetchone()[0]
+        rounds = conn.execute("SELECT COUNT(*) FROM rounds").fetchone()[0]
+    assert logs == WORKERS * WRITES
+    assert rounds == WORKERS * WRITES
+    out, err = capfd.readouterr()
+    assert "database is locked" not in out + err
+    assert "[LOG " not in out
+    assert "Failed to" not in out
@@ -0,0 +1,55 @@
+"""Word sampling with explicit weights: `Vocabulary.sample` and `game_batch.generate_sequences`."""
+
+import random
+import warnings
+
+import pytest
+
+from game_core import Vocabulary, generate_sequence
+
+WORDS = [f"w{i:03d}" for i in range(100)]
+
+
+def _drawn(sequence):
+    return [item for item in sequence if isinstance(item, str)]
+
+
+def test_sample_skips_zero_weights():
+    vocabulary = Vocabulary(WORDS, [1] * 3 + [0] * 97)
+    rng = random.Random(0)
+    for _ in range(200):
+        drawn = vocabulary.sample(10, rng)
+        assert sorted(drawn) == WORDS[:3]
+
+
+def test_sample_all_zero_weights_draws_nothing():
+    vocabulary = Vocabulary(WORDS[:5], [0] * 5)
+    assert vocabulary.sample(3, random.Random(0)) == []
+    sequence, _ = generate_sequence(6, 6, vocabulary, 2, rng=random.Random(0))
+    assert _drawn(sequence) == []
+
+
+@pytest.fixture
+def np():
+    return pytest.importorskip("numpy")
+
+
+@pytest.mark.parametrize("positive", [3, 50], ids=["keys-path", "rejection-path"])
+def test_batch_skips_zero_weights(np, positive):
+    from game_batch import generate_sequences
+
+    vocabulary = Vocabulary(WORDS, [1] * positive + [0] * (100 - positive))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # e.g. divide-by-zero in the keys path
+        batch = generate_sequences(500, 10, 10, vocabulary, 1, seed=0)
+    for i in range(len(batch)):
+        drawn = _drawn(batch.trial(i)[0])
+        assert len(drawn) == min(10, positive) == len(set(drawn))
+        assert set(drawn) <= set(WORDS[:positive])
+
+
+def test_batch_all_zero_weights_draws_nothing(np):
+    from game_batch import generate_sequences
+
+    batch = generate_sequences(20, 6, 6, Vocabulary(WORDS[:5], [0] * 5), 2, seed=0)
+    assert all(_drawn(batch.trial(i)[0]) == [] for i in range(len(batch)))
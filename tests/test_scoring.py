@@ -0,0 +1,90 @@
+"""`check_answer` with and without details, and `game_batch.score_batch` against it."""
+
+import random
+
+import pytest
+
+from game_core import WORDS, check_answer
+
+# Values a typed answer can hold besides the key's items; 1.0 and True compare equal to 1.
+STRAYS = (None, "zzz", "", 1.0, True, 11, -1)
+
+
+def _rounds(n, seed=0):
+    rng = random.Random(seed)
+    pool = list(range(10)) + WORDS
+    for _ in range(n):
+        key = [rng.choice(pool) for _ in range(rng.randint(0, 12))]
+        answer = list(key)
+        for _ in range(rng.randint(0, 3)):
+            edit = rng.randrange(4)
+            if edit == 0 and answer:
+                del answer[rng.randrange(len(answer))]
+            elif edit == 1:
+                answer.insert(rng.randint(0, len(answer)), rng.choice(pool))
+            elif edit == 2 and answer:
+                answer[rng.randrange(len(answer))] = rng.choice(STRAYS + tuple(pool))
+            else:
+                answer = answer[:rng.randint(0, len(answer))]
+        yield key, answer
+
+
+def test_check_answer_without_details_matches_details():
+    for key, answer in _rounds(5000):
+        correct, errors, details = check_answer(answer, key)
+        assert check_answer(answer, key, details=False) == (correct, errors, None)
+        assert len(details) == len(key)
+
+
+def test_check_answer_details():
+    assert check_answer([1, "apple"], [1, "apple"]) == (True, 0, [(1, 1, True), ("apple", "apple", True)])
+    assert check_answer([1], [1, 2]) == (False, 1, [(1, 1, True), ("----", 2, False)])
+    # Extra items are not errors, but the answer is still wrong.
+    assert check_answer([1, 2, 3], [1, 2]) == (False, 0, [(1, 1, True), (2, 2, True)])
+
+
+@pytest.fixture(scope="module")
+def batch():
+    np = pytest.importorskip("numpy")
+    from game_batch import encode_items
+
+    rounds = list(_rounds(3000, seed=1))
+    keys, key_lengths = encode_items([k for k, _ in rounds], WORDS, strict=True)
+    answers, answer_lengths = encode_items([a for _, a in rounds], WORDS)
+    return np, rounds, keys, key_lengths, answers, answer_lengths
+
+
+def test_score_batch_matches_check_answer(batch):
+    np, rounds, keys, key_lengths, answers, answer_lengths = batch
+    from game_batch import score_batch
+
+    score = score_batch(keys, answers, key_lengths, answer_lengths, positions=True)
+    for i, (key, answer) in enumerate(rounds):
+        correct, errors, details = check_answer(answer, key)
+        assert bool(score.correct[i]) == correct
+        assert int(score.errors[i]) == errors
+        assert score.position_ok[i, :len(key)].tolist() == [ok for _, _, ok in details]
+        assert not score.position_ok[i, len(key):].any()
+
+
+def test_score_batch_ragged_matches_padded(batch):
+    np, rounds, keys, key_lengths, answers, answer_lengths = batch
+    from game_batch import score_batch
+
+    def ragged(codes, lengths):
+        values = np.concatenate([row[:n] for row, n in zip(codes, lengths)])
+        return values, np.concatenate([[0], np.cumsum(lengths)])
+
+    padded = score_batch(keys, answers, key_lengths, answer_lengths)
+    flat = score_batch(ragged(keys, key_lengths), ragged(answers, answer_lengths))
+    assert np.array_equal(flat.correct, padded.correct)
+    assert np.array_equal(flat.errors, padded.errors)
+    assert flat.position_ok is None
+
+
+def test_score_batch_rejects_mismatched_trials(batch):
+    np, _, keys, key_lengths, answers, answer_lengths = batch
+    from game_batch import score_batch
+
+    with pytest.raises(ValueError):
+        score_batch(keys[:2], answers[:3], key_lengths[:2], answer_lengths[:3])